@@ -0,0 +1,190 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')  # run without a window
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')  # keep stdout valid JSON
+
+import json
+import platform
+import argparse
+import subprocess
+import numpy as np
+import pygame
+from math import ceil
+from time import perf_counter
+from settings import WIDTH, HEIGHT, FPS, TILE_SIZE
+from game_data import Map, Data, GameData
+from input import Input
+from level import Level
+from menu import Menu
+
+SYNTHETIC_LEVEL_OFFSET = 1_000_000  # ids of generated levels, which are never on disk
+
+
+def add_synthetic_level(n_rows: int, base_level: int = 0) -> int:
+    """Register a level made by stacking copies of a level vertically, with a single spawn at the top, and return its id."""
+    base = GameData.level_data_dict[base_level]
+    level_map = {}
+    for style, layout in base.map.items():
+        if style == Map.player:
+            stacked = np.full((n_rows, layout.shape[1]), -1, dtype=layout.dtype)
+            stacked[:min(n_rows, len(layout))] = layout[:n_rows]
+        else:
+            stacked = np.concatenate([layout] * ceil(n_rows / len(layout)))[:n_rows]
+        level_map[style] = stacked
+
+    level_id = SYNTHETIC_LEVEL_OFFSET + n_rows
+    GameData.level_data_dict.register(level_id, Data(level_map, base.backgrounds, base.tileset))
+    return level_id
+
+
+def time_calls(func, min_time: float = 0.5) -> dict:
+    """Call a function repeatedly for at least min_time seconds and return its call rate."""
+    func()  # warm up caches
+    n_calls = 0
+    start = perf_counter()
+    while (elapsed := perf_counter() - start) < min_time:
+        func()
+        n_calls += 1
+    return {'calls': n_calls, 'mean_ms': elapsed / n_calls * 1000, 'per_second': n_calls / elapsed}
+
+
+def load_level(level_id: int, headless: bool = False, parallel: bool | None = None) -> tuple[Level, dict]:
+    """Load a level and return it with the duration of each loading phase in milliseconds, forcing a serial or parallel collision build if given."""
+    level = Level(Input(), 1 / FPS, headless=headless, level=level_id)
+    if parallel is not None:
+        level.parallel_build_min_tiles = 0 if parallel else None
+    start = perf_counter()
+    level.loading()
+    phases = {status: seconds * 1000 for status, seconds in level.phase_times.items()}
+    phases['total'] = (perf_counter() - start) * 1000
+    return level, phases
+
+
+def bench_collision(level: Level, min_time: float) -> dict:
+    """Return physics steps per second for shots with every line of the level loaded."""
+    level.collision_world.load_all()
+    player = level.player
+    shots = [(200, -300), (-150, -400), (50, -600), (-400, -100), (300, -500)]
+    max_steps = FPS * 10
+
+    def run_shots() -> int:
+        n_steps = 0
+        for shot in shots:
+            player.death(force=True)
+            player.shoot(shot)
+            for _ in range(max_steps):
+                if player.is_sleeping:
+                    break
+                player.update(1 / FPS)
+                n_steps += 1
+        return n_steps
+
+    run_shots()  # warm up caches
+    n_steps = 0
+    start = perf_counter()
+    while (elapsed := perf_counter() - start) < min_time:
+        n_steps += run_shots()
+    return {'loaded_lines': len(level.collision_world.loaded_lines), 'steps': n_steps, 'steps_per_second': n_steps / elapsed}
+
+
+def bench_reload_hitboxes(level: Level, min_time: float) -> dict:
+    """Return cost of moving the hitbox window by one tile row, and of jumping to a new window."""
+    map_height = level.get_map_size()[1]
+    screen_height = pygame.display.get_surface().get_height()
+    positions = list(range(0, max(map_height - screen_height, 0) + 1, TILE_SIZE))
+    index = 0
+
+    def scroll() -> None:
+        nonlocal index
+        y = positions[index % len(positions)]
+        level.reload_hitboxes(y + screen_height, y)
+        index += 1
+
+    def jump() -> None:
+        nonlocal index
+        y = positions[(index * 7919) % len(positions)]  # far apart windows
+        level.reload_hitboxes(y + screen_height, y)
+        index += 1
+
+    return {'scroll': time_calls(scroll, min_time), 'jump': time_calls(jump, min_time)}
+
+
+def bench_custom_draw(level: Level, min_time: float) -> dict:
+    """Return frames per second of drawing terrain while scrolling through the map."""
+    map_height = level.get_map_size()[1]
+    screen_height = pygame.display.get_surface().get_height()
+    offset = pygame.Vector2()
+
+    def draw() -> None:
+        offset.y = (offset.y + TILE_SIZE) % max(map_height - screen_height, 1)
+        level.visible_sprites.custom_draw(offset)
+
+    result = time_calls(draw, min_time)
+    return {'fps': result['per_second'], 'mean_ms': result['mean_ms']}
+
+
+def bench_blur(min_time: float) -> dict:
+    """Return cost of blurring the display surface for the paused menu."""
+    paused = Menu().paused
+    surf = pygame.display.get_surface()
+    return time_calls(lambda: paused.blur(surf, paused.blur_magnitude), min_time)
+
+
+def get_commit() -> str | None:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(rows: list[int], min_time: float) -> dict:
+    """Run all benchmarks and return their results."""
+    pygame.init()
+    pygame.display.set_mode((WIDTH, HEIGHT))
+
+    results = {
+        'commit': get_commit(),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'pygame': pygame.version.ver,
+        'load': {},
+        'collision': {},
+        'reload_hitboxes': {},
+        'custom_draw': {},
+    }
+
+    load_level(0)  # make sure the collision cache of level0 exists
+    levels = {'level0': 0, 'level0 uncached': add_synthetic_level(len(GameData.level_data_dict[0].map[Map.terrain0]))}
+    for n_rows in rows:
+        levels[f'{n_rows} rows'] = add_synthetic_level(n_rows)
+
+    for name, level_id in levels.items():
+        level, results['load'][name] = load_level(level_id)
+        if name == 'level0 uncached':
+            continue
+        if level_id != 0:
+            _, results['load'][f'{name} serial'] = load_level(level_id, headless=True, parallel=False)
+            _, results['load'][f'{name} parallel'] = load_level(level_id, headless=True, parallel=True)
+        results['reload_hitboxes'][name] = bench_reload_hitboxes(level, min_time)
+        results['custom_draw'][name] = bench_custom_draw(level, min_time)
+        results['collision'][name] = bench_collision(level, min_time)
+
+    results['blur'] = bench_blur(min_time)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark loading, physics and drawing, and write the results as JSON.")
+    parser.add_argument('-o', '--output', help="file to write results to, printed if not given")
+    parser.add_argument('--rows', type=int, nargs='*', default=[200, 1000, 5000], help="heights of generated maps, 5000 rows is above the parallel build threshold")
+    parser.add_argument('--min-time', type=float, default=0.5, help="seconds to repeat each measurement for")
+    args = parser.parse_args()
+
+    results = run(args.rows, args.min_time)
+    pygame.quit()
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(text + '\n')
+    else:
+        print(text)
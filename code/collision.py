@@ -0,0 +1,485 @@
+import numpy as np
+from math import floor, ceil, sqrt
+from collections import namedtuple
+from settings import TILE_SIZE
+from game_data import Map
+from tile import LineHitbox, TileData, get_line_templates, get_normal
+import shapely.geometry
+
+
+class SpatialGrid:
+    """Uniform grid that hashes objects into cells for local lookups."""
+    def __init__(self, cell_size: int = TILE_SIZE) -> None:
+        self.cell_size = cell_size
+        self.cells: dict[tuple[int, int], list] = {}
+
+    def _get_cells(self, x1: float, y1: float, x2: float, y2: float):
+        """Yield every cell key covered by a rectangle, edges inclusive."""
+        for col in range(floor(x1 / self.cell_size), floor(x2 / self.cell_size) + 1):
+            for row in range(floor(y1 / self.cell_size), floor(y2 / self.cell_size) + 1):
+                yield col, row
+
+    def insert(self, item, x1: float, y1: float, x2: float, y2: float) -> None:
+        """Add item to all cells covered by its bounding rectangle."""
+        for key in self._get_cells(x1, y1, x2, y2):
+            self.cells.setdefault(key, []).append(item)
+
+    def query(self, x1: float, y1: float, x2: float, y2: float) -> list:
+        """Return unique items in cells covered by a rectangle."""
+        items = {}
+        for key in self._get_cells(x1, y1, x2, y2):
+            items.update(dict.fromkeys(self.cells.get(key, ())))
+        return list(items)
+
+    def clear(self) -> None:
+        self.cells.clear()
+
+
+def point_segment_distance_sq_array(px, py, ax, ay, bx, by) -> np.ndarray:
+    """Return squared distances between points and segments, broadcasting over arrays."""
+    abx, aby = bx - ax, by - ay
+    apx, apy = px - ax, py - ay
+    length_sq = abx * abx + aby * aby
+    t = np.clip(np.divide(apx * abx + apy * aby, length_sq, out=np.zeros(np.broadcast(apx, length_sq).shape), where=length_sq > 0), 0, 1)
+    dx = apx - t * abx
+    dy = apy - t * aby
+    return dx * dx + dy * dy
+
+
+def _cross(o: tuple, a: tuple, b: tuple) -> float:
+    """Return z component of the cross product of (a - o) and (b - o)."""
+    return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+
+def _on_segment(a: tuple, b: tuple, p: tuple) -> bool:
+    """Return whether a point collinear with a segment lies within its bounds."""
+    return min(a[0], b[0]) <= p[0] <= max(a[0], b[0]) and min(a[1], b[1]) <= p[1] <= max(a[1], b[1])
+
+
+def point_segment_distance_sq(p: tuple, a: tuple, b: tuple) -> float:
+    """Return squared distance from point p to segment ab."""
+    abx, aby = b[0] - a[0], b[1] - a[1]
+    apx, apy = p[0] - a[0], p[1] - a[1]
+    length_sq = abx * abx + aby * aby
+    t = 0 if length_sq == 0 else max(0, min(1, (apx * abx + apy * aby) / length_sq))
+    dx = apx - t * abx
+    dy = apy - t * aby
+    return dx * dx + dy * dy
+
+
+def segments_intersect(a: tuple, b: tuple, c: tuple, d: tuple) -> bool:
+    """Return whether segments ab and cd touch or cross."""
+    d1 = _cross(c, d, a)
+    d2 = _cross(c, d, b)
+    d3 = _cross(a, b, c)
+    d4 = _cross(a, b, d)
+    if ((d1 > 0 > d2) or (d1 < 0 < d2)) and ((d3 > 0 > d4) or (d3 < 0 < d4)):
+        return True
+    return (
+        (d1 == 0 and _on_segment(c, d, a))
+        or (d2 == 0 and _on_segment(c, d, b))
+        or (d3 == 0 and _on_segment(a, b, c))
+        or (d4 == 0 and _on_segment(a, b, d))
+    )
+
+
+def segment_distance_sq(a: tuple, b: tuple, c: tuple, d: tuple) -> float:
+    """Return squared distance between segments ab and cd."""
+    if segments_intersect(a, b, c, d):
+        return 0
+    return min(
+        point_segment_distance_sq(a, c, d),
+        point_segment_distance_sq(b, c, d),
+        point_segment_distance_sq(c, a, b),
+        point_segment_distance_sq(d, a, b)
+    )
+
+
+def circle_intersects_segment(center: tuple, radius: float, a: tuple, b: tuple) -> bool:
+    return point_segment_distance_sq(center, a, b) <= radius * radius
+
+
+def capsule_intersects_segment(a: tuple, b: tuple, radius: float, c: tuple, d: tuple) -> bool:
+    """Return whether a circle swept along ab touches segment cd."""
+    return segment_distance_sq(a, b, c, d) <= radius * radius
+
+
+def circle_segment_time_of_impact(start: tuple, end: tuple, radius: float, a: tuple, b: tuple) -> float | None:
+    """Return fraction of the motion from start to end at which a moving circle first touches segment ab."""
+    if point_segment_distance_sq(start, a, b) <= radius * radius:
+        return 0.0  # already touching
+
+    dx, dy = end[0] - start[0], end[1] - start[1]
+    times = []
+
+    # contact with the face of the segment
+    abx, aby = b[0] - a[0], b[1] - a[1]
+    length_sq = abx * abx + aby * aby
+    if length_sq > 0:
+        length = sqrt(length_sq)
+        nx, ny = -aby / length, abx / length
+        s0 = (start[0] - a[0]) * nx + (start[1] - a[1]) * ny  # signed distance from line
+        ds = dx * nx + dy * ny
+        if ds != 0:
+            side = radius if s0 > 0 else -radius
+            t = (side - s0) / ds
+            if 0 <= t <= 1:
+                px = start[0] + dx * t - a[0]
+                py = start[1] + dy * t - a[1]
+                if 0 <= px * abx + py * aby <= length_sq:
+                    times.append(t)
+
+    # contact with either end point: |start + t * d - p| = radius
+    qa = dx * dx + dy * dy
+    if qa > 0:
+        for p in (a, b):
+            fx, fy = start[0] - p[0], start[1] - p[1]
+            qb = 2 * (fx * dx + fy * dy)
+            qc = fx * fx + fy * fy - radius * radius
+            discriminant = qb * qb - 4 * qa * qc
+            if discriminant < 0:
+                continue
+            t = (-qb - sqrt(discriminant)) / (2 * qa)
+            if 0 <= t <= 1:
+                times.append(t)
+
+    return min(times) if times else None
+
+
+class ShapelyHitbox:
+    """Player hitbox made of a buffered circle and a trail line using shapely geometry.
+    If continuous, the whole circle is swept along the trail."""
+    def __init__(self, pos: tuple, prev_pos: tuple, radius: float, continuous: bool = False) -> None:
+        self.circle = shapely.geometry.Point(pos).buffer(radius)
+        self.trail = shapely.geometry.LineString((pos, prev_pos))
+        self.radius = radius
+        self.continuous = continuous
+
+    def _intersects(self, geometry) -> bool:
+        if self.continuous:
+            return self.trail.distance(geometry) <= self.radius
+        return self.circle.intersects(geometry) or self.trail.intersects(geometry)
+
+    def intersects_line(self, line) -> bool:
+        return self._intersects(line.hitbox)
+
+    def circle_intersects_line(self, line) -> bool:
+        return self.circle.intersects(line.hitbox)
+
+
+class AnalyticHitbox:
+    """Player hitbox made of an exact circle and a trail line using closed-form tests.
+    If continuous, the whole circle is swept along the trail."""
+    def __init__(self, pos: tuple, prev_pos: tuple, radius: float, continuous: bool = False) -> None:
+        self.pos = (pos[0], pos[1])
+        self.prev_pos = (prev_pos[0], prev_pos[1])
+        self.radius = radius
+        self.continuous = continuous
+
+    def intersects_line(self, line) -> bool:
+        a, b = line.coords
+        if self.continuous:
+            return capsule_intersects_segment(self.prev_pos, self.pos, self.radius, a, b)
+        return circle_intersects_segment(self.pos, self.radius, a, b) or segments_intersect(self.pos, self.prev_pos, a, b)
+
+    def circle_intersects_line(self, line) -> bool:
+        return circle_intersects_segment(self.pos, self.radius, *line.coords)
+
+
+HITBOX_BACKENDS = {
+    'analytic': AnalyticHitbox,
+    'shapely': ShapelyHitbox
+}
+
+
+def compare_hitbox_backends(radius: float = 10, margin: float = 0.5) -> list[tuple]:
+    """Return fixed cases where the analytic and shapely hitboxes disagree, as (test, pos, prev_pos, line coords).
+    Cases within margin of touching are skipped, as the shapely circle is a polygon."""
+    lines = [LineHitbox.from_coords(coords, angle) for coords, angle in (
+        (((0, 0), (64, 0)), 0),
+        (((0, 0), (0, 64)), 90),
+        (((0, 0), (64, 64)), 135),
+        (((64, 0), (0, 32)), 333.43)
+    )]
+    positions = [(-20.3 + 7 * i, -19.6 + 7 * j) for i in range(16) for j in range(16)]
+    trails = ((0, 0), (30.1, -40.2), (-25.3, 15.7), (4.1, 60.9))
+
+    mismatches = []
+    for line in lines:
+        a, b = line.coords
+        for pos in positions:
+            for trail in trails:
+                prev_pos = (pos[0] + trail[0], pos[1] + trail[1])
+                circle_distance = sqrt(point_segment_distance_sq(pos, a, b))
+                trail_distance = 0 if segments_intersect(pos, prev_pos, a, b) else sqrt(min(
+                    point_segment_distance_sq(pos, a, b),
+                    point_segment_distance_sq(prev_pos, a, b),
+                    point_segment_distance_sq(a, pos, prev_pos),
+                    point_segment_distance_sq(b, pos, prev_pos)
+                ))
+                for continuous in (False, True):
+                    tests = {
+                        'circle_intersects_line': circle_distance,
+                        # swept circle, or circle and trail line
+                        'intersects_line': trail_distance if continuous or trail_distance == 0 else circle_distance
+                    }
+                    hitboxes = [backend(pos, prev_pos, radius, continuous) for backend in HITBOX_BACKENDS.values()]
+                    for test, distance in tests.items():
+                        if abs(distance - radius) < margin:
+                            continue
+                        results = [getattr(hitbox, test)(line) for hitbox in hitboxes]
+                        if len(set(results)) > 1:
+                            mismatches.append((test, pos, prev_pos, line.coords))
+    return mismatches
+
+
+Segment = namedtuple('Segment', 'start, end, angle, bounciness, tile_type, tile')
+
+
+def remove_shared_segments(segments: list[Segment]) -> list[Segment]:
+    """Remove segments shared by more than one tile, as they are internal edges."""
+    # group segments by their end points regardless of direction
+    segment_dict = {}
+    for segment in segments:
+        key = (segment.start, segment.end) if segment.start <= segment.end else (segment.end, segment.start)
+        segment_dict.setdefault(key, []).append(segment)
+    return [shared[0] for shared in segment_dict.values() if len(shared) == 1]
+
+
+def merge_collinear_segments(segments: list[Segment]) -> list[Segment]:
+    """Join touching segments which lie on the same infinite line and share a normal and surface."""
+    # group segments by normal, distance from origin along the normal and surface properties
+    segment_groups = {}
+    for segment in segments:
+        nx, ny = get_normal(segment.angle)
+        x, y = segment.start
+        key = (round(segment.angle, 6), round(x * nx + y * ny, 6), segment.bounciness, segment.tile_type)
+        segment_groups.setdefault(key, []).append(segment)
+
+    merged_segments = []
+    for group in segment_groups.values():
+        if len(group) == 1:
+            merged_segments.extend(group)
+            continue
+
+        # sort end points along the line direction
+        nx, ny = get_normal(group[0].angle)
+        tx, ty = -ny, nx
+        spans = []
+        for segment in group:
+            a, b = sorted((segment.start, segment.end), key=lambda p: p[0] * tx + p[1] * ty)
+            spans.append((a[0] * tx + a[1] * ty, b[0] * tx + b[1] * ty, a, b, segment))
+        spans.sort(key=lambda span: span[0])
+
+        # sweep along the line, joining spans which touch
+        run = [spans[0]]
+        run_end = spans[0][1]
+        for span in spans[1:]:
+            if span[0] <= run_end + 1e-6:
+                run.append(span)
+                if span[1] > run_end:
+                    run_end = span[1]
+                continue
+            merged_segments.append(_join_spans(run))
+            run = [span]
+            run_end = span[1]
+        merged_segments.append(_join_spans(run))
+    return merged_segments
+
+
+def _join_spans(spans: list[tuple]) -> Segment:
+    """Return a single segment covering a run of touching collinear spans."""
+    first = spans[0][4]
+    if len(spans) == 1:
+        return first
+    end = max(spans, key=lambda span: span[1])[3]
+    return first._replace(start=spans[0][2], end=end)
+
+
+COLLISION_WORLD_ARRAYS = ('x1', 'y1', 'x2', 'y2', 'nx', 'ny', 'angle', 'bounciness', 'tile_type', 'tile')
+
+
+class CollisionWorld:
+    """Level-wide static collision lines stored as flat arrays, indexed by a spatial grid and by tile row."""
+    def __init__(self, cell_size: int = TILE_SIZE) -> None:
+        self.cell_size = cell_size
+        self.pending_segments: list[Segment] = []  # tile edges added before build
+        self.n_tiles = 0
+
+        # struct of arrays, one entry per line
+        self.x1 = np.empty(0)
+        self.y1 = np.empty(0)
+        self.x2 = np.empty(0)
+        self.y2 = np.empty(0)
+        self.nx = np.empty(0)
+        self.ny = np.empty(0)
+        self.angle = np.empty(0)
+        self.bounciness = np.empty(0)
+        self.tile_type = np.empty(0, dtype=np.int8)  # Map value
+        self.tile = np.empty(0, dtype=np.int32)  # index of the first tile the line came from
+
+        self.grid = SpatialGrid(cell_size)
+        self.rows: dict[int, list[int]] = {}  # tile row -> line indices
+        self.loaded_lines: dict[int, int] = {}  # line index -> number of loaded rows it spans
+        self.loaded_index = None  # array of loaded line indices, rebuilt after the window changes
+        self.line_cache: dict[int, LineHitbox] = {}
+
+    def __len__(self) -> int:
+        return len(self.x1)
+
+    def add_tile(self, pos: tuple, tile_data: TileData, tile_type: Map) -> None:
+        """Add the edges of a collision tile, translated from its tile type templates."""
+        for rel_coords, angle in get_line_templates(tile_data):
+            start, end = ((float(x * TILE_SIZE + pos[0]), float(y * TILE_SIZE + pos[1])) for x, y in rel_coords)
+            self.pending_segments.append(Segment(start, end, angle, tile_data.bounciness, tile_type, self.n_tiles))
+        self.n_tiles += 1
+
+    def add_segments(self, segments: list[Segment]) -> None:
+        """Add tile edges collected by another collision world, such as a region worker."""
+        self.pending_segments.extend(segments)
+
+    def build(self) -> None:
+        """Remove internal edges, merge collinear edges and store the result."""
+        segments = merge_collinear_segments(remove_shared_segments(self.pending_segments))
+        self.pending_segments = []
+        self.set_segments(segments)
+
+    def set_segments(self, segments: list[Segment]) -> None:
+        """Pack segments into arrays and index them."""
+        self.x1 = np.array([s.start[0] for s in segments], dtype=np.float64)
+        self.y1 = np.array([s.start[1] for s in segments], dtype=np.float64)
+        self.x2 = np.array([s.end[0] for s in segments], dtype=np.float64)
+        self.y2 = np.array([s.end[1] for s in segments], dtype=np.float64)
+        self.angle = np.array([s.angle for s in segments], dtype=np.float64)
+        normals = [get_normal(s.angle) for s in segments]
+        self.nx = np.array([n[0] for n in normals], dtype=np.float64)
+        self.ny = np.array([n[1] for n in normals], dtype=np.float64)
+        self.bounciness = np.array([s.bounciness for s in segments], dtype=np.float64)
+        self.tile_type = np.array([s.tile_type.value for s in segments], dtype=np.int8)
+        self.tile = np.array([s.tile for s in segments], dtype=np.int32)
+        self._index()
+
+    def get_arrays(self) -> dict[str, np.ndarray]:
+        """Return the line arrays by name, e.g. for saving with np.savez."""
+        return {name: getattr(self, name) for name in COLLISION_WORLD_ARRAYS}
+
+    def set_arrays(self, arrays) -> None:
+        """Restore lines from arrays returned by get_arrays and index them."""
+        for name in COLLISION_WORLD_ARRAYS:
+            setattr(self, name, np.array(arrays[name]))
+        self._index()
+
+    def _index(self) -> None:
+        """Hash lines into grid cells and tile rows."""
+        self.grid.clear()
+        self.rows = {}
+        self.loaded_lines = {}
+        self.loaded_index = None
+        self.line_cache = {}
+        min_x = np.minimum(self.x1, self.x2).tolist()
+        min_y = np.minimum(self.y1, self.y2).tolist()
+        max_x = np.maximum(self.x1, self.x2).tolist()
+        max_y = np.maximum(self.y1, self.y2).tolist()
+        for i in range(len(self)):
+            self.grid.insert(i, min_x[i], min_y[i], max_x[i], max_y[i])
+            first_row = floor(min_y[i] / self.cell_size)
+            for row in range(first_row, max(first_row, ceil(max_y[i] / self.cell_size) - 1) + 1):
+                self.rows.setdefault(row, []).append(i)
+
+    def get_line(self, i: int) -> LineHitbox:
+        """Return LineHitbox view of a line, created the first time it is needed."""
+        if i not in self.line_cache:
+            self.line_cache[i] = LineHitbox.from_coords(
+                ((float(self.x1[i]), float(self.y1[i])), (float(self.x2[i]), float(self.y2[i]))),
+                float(self.angle[i]),
+                float(self.bounciness[i]),
+                Map(int(self.tile_type[i]))
+            )
+        return self.line_cache[i]
+
+    def query(self, x1: float, y1: float, x2: float, y2: float) -> list[LineHitbox]:
+        """Return lines in grid cells covered by a rectangle."""
+        return [self.get_line(i) for i in self.grid.query(x1, y1, x2, y2)]
+
+    def contains_point(self, point: tuple) -> bool:
+        """Return whether a point is inside solid collision tiles, by counting lines crossed by a ray to the right.
+        Needed as lines shared by neighbouring tiles are removed, so a circle deep inside terrain touches no line."""
+        px, py = point[0], point[1]
+        is_inside = False
+        for i in self.rows.get(floor(py / self.cell_size), ()):
+            if self.tile_type[i] == Map.platform_collision.value:
+                continue  # platforms are open lines without an inside
+            x1, y1, x2, y2 = float(self.x1[i]), float(self.y1[i]), float(self.x2[i]), float(self.y2[i])
+            if (y1 <= py) != (y2 <= py) and x1 + (py - y1) * (x2 - x1) / (y2 - y1) > px:
+                is_inside = not is_inside
+        return is_inside
+
+    def load_row(self, row: int) -> None:
+        for i in self.rows.get(row, ()):
+            self.loaded_lines[i] = self.loaded_lines.get(i, 0) + 1
+        self.loaded_index = None
+
+    def unload_row(self, row: int) -> None:
+        for i in self.rows.get(row, ()):
+            if i in self.loaded_lines:
+                self.loaded_lines[i] -= 1
+                if not self.loaded_lines[i]:
+                    del self.loaded_lines[i]
+        self.loaded_index = None
+
+    def load_all(self) -> None:
+        for row in self.rows:
+            self.load_row(row)
+
+    def unload_lines(self) -> None:
+        self.loaded_lines.clear()
+        self.loaded_index = None
+
+    def sweep(self, start: tuple, end: tuple, radius: float, velocity: tuple, continuous: bool = False) -> tuple[np.ndarray, np.ndarray]:
+        """Return indices of loaded lines touched by a circle swept from start to end, and their collision scores.
+        Matches the platform, separation and score rules of the player, applied to all loaded lines at once."""
+        if self.loaded_index is None:
+            self.loaded_index = np.fromiter(self.loaded_lines, dtype=np.intp, count=len(self.loaded_lines))
+        index = self.loaded_index
+        x1, y1, x2, y2 = self.x1[index], self.y1[index], self.x2[index], self.y2[index]
+        nx, ny = self.nx[index], self.ny[index]
+        sx, sy = start[0], start[1]
+        ex, ey = end[0], end[1]
+
+        # distance between the swept segment and every line, zero where they cross
+        start_distance_sq = point_segment_distance_sq_array(sx, sy, x1, y1, x2, y2)
+        distance_sq = np.minimum.reduce((
+            start_distance_sq,
+            point_segment_distance_sq_array(ex, ey, x1, y1, x2, y2),
+            point_segment_distance_sq_array(x1, y1, sx, sy, ex, ey),
+            point_segment_distance_sq_array(x2, y2, sx, sy, ex, ey)
+        ))
+        d1 = (x2 - x1) * (sy - y1) - (y2 - y1) * (sx - x1)
+        d2 = (x2 - x1) * (ey - y1) - (y2 - y1) * (ex - x1)
+        d3 = (ex - sx) * (y1 - sy) - (ey - sy) * (x1 - sx)
+        d4 = (ex - sx) * (y2 - sy) - (ey - sy) * (x2 - sx)
+        crossing = (d1 * d2 < 0) & (d3 * d4 < 0)
+        mask = crossing | (distance_sq <= radius * radius)
+
+        # platforms only collide from above
+        is_platform = self.tile_type[index] == Map.platform_collision.value
+        mask &= ~is_platform | ((velocity[1] > 0) & (sy + radius < y1))
+
+        if continuous:
+            # ignore lines the circle starts on and moves strictly away from
+            mask &= ((ex - sx) * nx + (ey - sy) * ny <= 0) | (start_distance_sq > radius * radius)
+
+        # score by angle between velocity and normal, as Player._get_collision_score
+        angle = np.degrees(np.arctan2(ny[mask], nx[mask]) - np.arctan2(velocity[1], velocity[0]))
+        angle = np.where(angle > 0, angle, angle + 360)
+        return index[mask], 1 - np.abs(1 - angle / 180)
+
+    def get_loaded_lines(self) -> list[LineHitbox]:
+        return [self.get_line(i) for i in self.loaded_lines]
+
+
+if __name__ == '__main__':
+    mismatches = compare_hitbox_backends()
+    for mismatch in mismatches:
+        print(*mismatch)
+    print(f"{len(mismatches)} mismatches between the hitbox backends")
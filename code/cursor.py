@@ -53,7 +53,7 @@ class Cursor(pygame.cursors.Cursor):
         if not self.input.mouse.is_focused:
             self.locked = False
 
-        if pygame.mouse.get_pressed(3)[0]:  # if left mouse button pressed
+        if self.input.mouse.is_pressed:  # if left mouse button pressed
             if self.is_hover and self._is_player_can_jump():
                 self.locked = True
         else:  # released
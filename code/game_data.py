@@ -1,4 +1,9 @@
-from helper import import_csv_layout
+import os
+import re
+import zipfile
+import numpy as np
+from glob import glob
+from helper import import_csv_layout, save_npz
 from dataclasses import dataclass
 from enum import Enum, auto
 
@@ -13,32 +18,135 @@ class Map(Enum):
     player = auto()
 
 
+# order of drawing (top=first, bottom=last)
+MAP_FILE_NAMES = {
+    Map.wall: 'map_wall.csv',
+    Map.terrain0: 'map_terrain0.csv',
+    Map.terrain1: 'map_terrain1.csv',
+
+    Map.block_collision: 'map_block_collision.csv',
+    Map.slope_collision: 'map_slope_collision.csv',
+    Map.platform_collision: 'map_platform_collision.csv',
+    Map.player: 'map_player_spawn.csv'
+}
+
+
+COMPILED_LEVEL_NAME = 'level.npz'
+COLLISION_CACHE_NAME = 'collision.npz'
+
+
+def get_compiled_level_path(level_path: str) -> str:
+    return os.path.join(level_path, 'map', COMPILED_LEVEL_NAME)
+
+
+def get_collision_cache_path(level_path: str) -> str:
+    return os.path.join(level_path, 'map', COLLISION_CACHE_NAME)
+
+
+def is_compiled_level_stale(level_path: str) -> bool:
+    """Return whether the compiled level is missing or older than any of its CSV layers."""
+    compiled_path = get_compiled_level_path(level_path)
+    if not os.path.exists(compiled_path):
+        return True
+    compiled_mtime = os.path.getmtime(compiled_path)
+    return any(os.path.getmtime(os.path.join(level_path, 'map', file_name)) > compiled_mtime for file_name in MAP_FILE_NAMES.values())
+
+
+def read_level_csvs(level_path: str) -> dict[Map, np.ndarray]:
+    """Return all CSV layers of a level as int32 arrays."""
+    return {style: np.array(import_csv_layout(os.path.join(level_path, 'map', file_name)), dtype=np.int32) for style, file_name in MAP_FILE_NAMES.items()}
+
+
+def compile_level(level_path: str, layers: dict[Map, np.ndarray] | None = None) -> str:
+    """Pack all CSV layers of a level into a single file of int32 arrays and return its path."""
+    if layers is None:
+        layers = read_level_csvs(level_path)
+    compiled_path = get_compiled_level_path(level_path)
+    save_npz(compiled_path, **{style.name: layout for style, layout in layers.items()})
+    return compiled_path
+
+
+def _read_compiled_level(level_path: str) -> dict[Map, np.ndarray]:
+    with np.load(get_compiled_level_path(level_path)) as layers:
+        return {style: layers[style.name] for style in MAP_FILE_NAMES}
+
+
+def _recompile_level(level_path: str) -> dict[Map, np.ndarray]:
+    """Return layers read from the CSVs, writing the compiled file for next time if possible."""
+    layers = read_level_csvs(level_path)
+    try:
+        compile_level(level_path, layers)
+    except OSError:
+        pass  # the compiled file is only an optimisation, e.g. the map folder may be read-only
+    return layers
+
+
+def load_compiled_level(level_path: str) -> dict[Map, np.ndarray]:
+    """Return layers of a level from its compiled file, recompiling it if the CSVs changed or the file is damaged."""
+    if is_compiled_level_stale(level_path):
+        return _recompile_level(level_path)
+    try:
+        return _read_compiled_level(level_path)
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        return _recompile_level(level_path)
+
+
 @dataclass(frozen=True, slots=True)
 class Data:
     map: dict
     backgrounds: tuple
+    tileset: str
+
+
+class LevelRegistry:
+    """Finds levels in graphics/levels/levelN and loads their maps the first time a level is requested."""
+    def __init__(self, path: str = '../graphics/levels') -> None:
+        self.path = path
+        self.cache: dict[int, Data] = {}
+
+    def get_level_ids(self) -> list[int]:
+        """Return sorted ids of all level folders which contain a map folder."""
+        level_ids = []
+        for level_path in glob(os.path.join(self.path, 'level*', 'map')):
+            match = re.fullmatch(r'level(\d+)', os.path.basename(os.path.dirname(level_path)))
+            if match:
+                level_ids.append(int(match.group(1)))
+        return sorted(level_ids)
+
+    def register(self, level: int, data: Data) -> None:
+        """Add a level which is not on disk, such as a generated one."""
+        self.cache[level] = data
+
+    def get_level_path(self, level: int) -> str:
+        return os.path.join(self.path, f'level{level}')
+
+    def _load(self, level: int) -> Data:
+        """Load all map layers of a level."""
+        level_path = self.get_level_path(level)
+        if not os.path.isdir(os.path.join(level_path, 'map')):
+            raise KeyError(f"Level not found: {level}")
+        return Data(
+            map=load_compiled_level(level_path),
+            backgrounds=tuple(sorted(glob(os.path.join(level_path, 'images', 'background_*.png')))),
+            tileset=os.path.join(level_path, 'images', 'tileset.png')
+        )
+
+    def __getitem__(self, level: int) -> Data:
+        if level not in self.cache:
+            self.cache[level] = self._load(level)
+        return self.cache[level]
+
+    def __contains__(self, level: int) -> bool:
+        return level in self.cache or os.path.isdir(os.path.join(self.get_level_path(level), 'map'))
 
 
 @dataclass(frozen=True, slots=True)
 class GameData:
-    level0 = Data(
-        map={
-            # order of drawing (top=first, bottom=last)
-            Map.wall: import_csv_layout('../graphics/levels/level0/map/map_wall.csv'),
-            Map.terrain0: import_csv_layout('../graphics/levels/level0/map/map_terrain0.csv'),
-            Map.terrain1: import_csv_layout('../graphics/levels/level0/map/map_terrain1.csv'),
-
-            Map.block_collision: import_csv_layout('../graphics/levels/level0/map/map_block_collision.csv'),
-            Map.slope_collision: import_csv_layout('../graphics/levels/level0/map/map_slope_collision.csv'),
-            Map.platform_collision: import_csv_layout('../graphics/levels/level0/map/map_platform_collision.csv'),
-            Map.player: import_csv_layout('../graphics/levels/level0/map/map_player_spawn.csv')
-        },
-        backgrounds=(
-            '../graphics/levels/level0/images/background_0.png',
-            '../graphics/levels/level0/images/background_1.png',
-            '../graphics/levels/level0/images/background_2.png'
-        )
-    )
-    level_data_dict = {
-        0: level0
-    }
+    level_data_dict = LevelRegistry()
+
+
+if __name__ == '__main__':
+    # compile every level ahead of time
+    registry = LevelRegistry()
+    for level_id in registry.get_level_ids():
+        print(compile_level(registry.get_level_path(level_id)))
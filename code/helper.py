@@ -1,5 +1,8 @@
+import os
+import tempfile
+import numpy as np
 from csv import reader
-from settings import TILE_SIZE
+from settings import TILE_SIZE, WIDTH, HEIGHT
 import pygame.image
 from collections import namedtuple
 
@@ -7,16 +10,28 @@ from collections import namedtuple
 Point = namedtuple('Point', 'x, y')
 
 
-def import_csv_layout(path) -> list[list[str]]:
-    """Open csv file and save as list."""
+def import_csv_layout(path) -> list[list[int]]:
+    """Open csv file and save as list of integer tile ids."""
     terrain_map = []
     with open(path) as map_:
         level = reader(map_, delimiter=',')
         for row in level:
-            terrain_map.append(list(row))
+            terrain_map.append([int(i) for i in row])
     return terrain_map
 
 
+def save_npz(path: str, **arrays) -> None:
+    """Write arrays to an .npz file, only replacing the old file once the new one is complete."""
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            np.savez(file, **arrays)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
 def import_cut_graphics(path) -> list[pygame.Surface]:
     """Returns a list of cut tiles from an image path."""
     image = pygame.image.load(path).convert_alpha()
@@ -32,3 +47,11 @@ def import_cut_graphics(path) -> list[pygame.Surface]:
             tile_img = image.subsurface((x, y, TILE_SIZE, TILE_SIZE))
             tiles.append(tile_img)
     return tiles
+
+
+def get_screen_size() -> tuple[int, int]:
+    """Return display size, or the configured window size when running without a display."""
+    display_surf = pygame.display.get_surface()
+    if display_surf is None:
+        return WIDTH, HEIGHT
+    return display_surf.get_size()
@@ -1,34 +1,123 @@
 import pygame
+import numpy as np
+from collections import namedtuple
+from typing import Iterable
+
+# device state of a single frame, recorded and replayed as a whole
+InputFrame = namedtuple('InputFrame', 'frame_time, mouse_pos, is_focused, is_pressed, is_esc_pressed, keys')
+
+RECORDING_VERSION = 1
+
+# bits of the flags array in recording files
+FOCUSED_FLAG = 1 << 0
+PRESSED_FLAG = 1 << 1
+ESC_PRESSED_FLAG = 1 << 2
+
+
+def save_recording(path: str, frames: list[InputFrame]) -> None:
+    """Write frames to a compressed file of arrays."""
+    flags = [
+        FOCUSED_FLAG * frame.is_focused | PRESSED_FLAG * frame.is_pressed | ESC_PRESSED_FLAG * frame.is_esc_pressed
+        for frame in frames
+    ]
+    with open(path, 'wb') as file:
+        np.savez_compressed(
+            file,
+            version=RECORDING_VERSION,
+            frame_time=np.array([frame.frame_time for frame in frames], dtype=np.float64),
+            mouse_pos=np.array([frame.mouse_pos for frame in frames], dtype=np.int32).reshape(-1, 2),
+            flags=np.array(flags, dtype=np.uint8),
+            key_counts=np.array([len(frame.keys) for frame in frames], dtype=np.int32),
+            keys=np.array([key for frame in frames for key in frame.keys], dtype=np.int32)
+        )
+
+
+def load_recording(path: str) -> list[InputFrame]:
+    """Return frames from a file written by save_recording."""
+    with np.load(path) as recording:
+        if int(recording['version']) != RECORDING_VERSION:
+            raise ValueError(f"Unsupported recording version: {int(recording['version'])}")
+        frame_times = recording['frame_time'].tolist()
+        mouse_positions = recording['mouse_pos'].tolist()
+        flags = recording['flags'].tolist()
+        key_counts = recording['key_counts'].tolist()
+        keys = recording['keys'].tolist()
+
+    frames = []
+    start = 0
+    for frame_time, mouse_pos, flag, key_count in zip(frame_times, mouse_positions, flags, key_counts):
+        frames.append(InputFrame(
+            frame_time,
+            tuple(mouse_pos),
+            bool(flag & FOCUSED_FLAG),
+            bool(flag & PRESSED_FLAG),
+            bool(flag & ESC_PRESSED_FLAG),
+            tuple(keys[start:start + key_count])
+        ))
+        start += key_count
+    return frames
 
 
 class Input:
     """Enables easier access to key presses outside game loop."""
-    def __init__(self) -> None:
+    def __init__(self, replay: Iterable[InputFrame] | None = None) -> None:
         self.mouse = self.Mouse()
 
         self.is_paused = False
         self.esc_held = False
 
         self.event_list = []
+        self.keys: tuple[int, ...] = ()  # keys pressed down this frame
+        self.frame_time = 0.0
+
+        # recording and replay
+        self.recording: list[InputFrame] | None = None  # frames since start_recording
+        self.replay = iter(replay) if replay is not None else None  # frames used instead of the devices
+        self.is_replay_finished = False
 
-    def _pause_event(self):
+    def start_recording(self) -> None:
+        self.recording = []
+
+    def _pause_event(self, is_esc_pressed: bool):
         """Manage actions on pause."""
-        if pygame.key.get_pressed()[pygame.K_ESCAPE]:
+        if is_esc_pressed:
             if not self.esc_held:
                 self.is_paused = not self.is_paused
                 self.esc_held = True
-                if self.is_paused:
-                    pygame.event.set_grab(False)
-                else:
-                    pygame.event.set_grab(True)
+                if self.replay is None:
+                    pygame.event.set_grab(not self.is_paused)
         else:
             self.esc_held = False
 
-    def update(self, event_list: list) -> None:
-        """Get events."""
+    def _read_frame(self, event_list: list, frame_time: float) -> InputFrame:
+        """Return state of the mouse and keyboard."""
+        return InputFrame(
+            frame_time,
+            pygame.mouse.get_pos(),
+            bool(pygame.mouse.get_focused()),
+            pygame.mouse.get_pressed(3)[0],
+            pygame.key.get_pressed()[pygame.K_ESCAPE],
+            tuple(event.key for event in event_list if event.type == pygame.KEYDOWN)
+        )
+
+    def update(self, event_list: list, frame_time: float) -> None:
+        """Get events, from the devices or the next replayed frame."""
         self.event_list = event_list
-        self.mouse.update()
-        self._pause_event()
+        if self.replay is None:
+            frame = self._read_frame(event_list, frame_time)
+        else:
+            frame = next(self.replay, None)
+            if frame is None:
+                self.is_replay_finished = True
+                return
+
+        if self.recording is not None:
+            self.recording.append(frame)
+
+        self.frame_time = frame.frame_time
+        self.keys = frame.keys
+        self.mouse.update(frame.mouse_pos, frame.is_focused, frame.is_pressed)
+        self._pause_event(frame.is_esc_pressed)
 
     class Mouse:
         def __init__(self) -> None:
@@ -36,8 +125,10 @@ class Input:
 
             self.pos = pygame.Vector2()
             self.is_focused = False
+            self.is_pressed = False  # left button
 
-        def update(self) -> None:
+        def update(self, pos: tuple[int, int], is_focused: bool, is_pressed: bool) -> None:
             """Manage actions."""
-            self.is_focused = pygame.mouse.get_focused()  # get whether the game is focused
-            self.pos.update(pygame.mouse.get_pos())  # get mouse position
+            self.is_focused = is_focused  # whether the game is focused
+            self.pos.update(pos)
+            self.is_pressed = is_pressed
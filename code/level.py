@@ -1,144 +1,295 @@
+import os
+import zipfile
+import multiprocessing
+import hashlib
 import pygame
-from tile import Tile, Platform, Terrain, TileType
+import numpy as np
+from queue import Queue
+from time import perf_counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from tile import Terrain, TileType, TileData, get_line_templates
 from player import Player
-from settings import WIDTH, HEIGHT, TILE_SIZE
-from game_data import Map, GameData
-from helper import import_cut_graphics
-from math import copysign, ceil
+from settings import WIDTH, HEIGHT, TILE_SIZE, MAX_PHYSICS_STEPS, PARALLEL_BUILD_MIN_TILES
+from game_data import Map, GameData, get_collision_cache_path
+from helper import import_cut_graphics, get_screen_size, save_npz
+from math import copysign, ceil, floor
 from input import Input
-from itertools import combinations
+from collision import CollisionWorld, Segment, remove_shared_segments
+from profiler import profiler
+
+# Tiled global tile id flags
+FLIPPED_HORIZONTALLY_FLAG = 1 << 31
+FLIPPED_VERTICALLY_FLAG = 1 << 30
+FLIPPED_ANTIDIAGONALLY_FLAG = 1 << 29
+TILE_ID_MASK = 0x0FFFFFFF
+
+COLLISION_STYLES = (Map.block_collision, Map.slope_collision, Map.platform_collision)
+TERRAIN_STYLES = (Map.wall, Map.terrain0, Map.terrain1)
+
+COLLISION_CACHE_VERSION = 1  # increase when the collision world is built differently
+
+
+def get_collision_cache_key(level_map: dict[Map, np.ndarray]) -> str:
+    """Return hash of the layers and tile types the collision world and spawn point are built from."""
+    digest = hashlib.sha256(f'{COLLISION_CACHE_VERSION} {TILE_SIZE}'.encode())
+    for tile_data in (TileType.block, TileType.platform, *TileType.slope_dict.values()):
+        digest.update(repr((tile_data, get_line_templates(tile_data))).encode())
+    for style in (*COLLISION_STYLES, Map.player):
+        layout = np.ascontiguousarray(level_map[style], dtype=np.int32)
+        digest.update(f'{style.name} {layout.shape}'.encode())
+        digest.update(layout.tobytes())
+    return digest.hexdigest()
+
+
+def get_collision_tile_data(style: Map, tile_id: int) -> TileData:
+    """Return tile type of a collision layer tile."""
+    match style:
+        case Map.block_collision:
+            return TileType.block
+        case Map.slope_collision:
+            return TileType.slope_dict[tile_id]
+        case Map.platform_collision:
+            return TileType.platform
+
+
+def _build_region(layouts: dict[Map, np.ndarray], first_row: int, first_tile: int) -> list[Segment]:
+    """Return edges of the collision tiles in a band of rows, without the ones shared inside the band."""
+    collision_world = CollisionWorld(TILE_SIZE)
+    collision_world.n_tiles = first_tile
+    for style, layout in layouts.items():
+        for row_index, row in enumerate(layout, first_row):
+            for col_index in np.flatnonzero(row != -1).tolist():
+                pos = (col_index * TILE_SIZE, row_index * TILE_SIZE)
+                collision_world.add_tile(pos, get_collision_tile_data(style, int(row[col_index])), style)
+    return remove_shared_segments(collision_world.pending_segments)
 
 
 class Level:
     """Creates and controls the level and camera."""
-    def __init__(self, input_: Input, frame_chunks: int, chunk_deltatime: float) -> None:
+    def __init__(self, input_: Input, physics_step: float, headless: bool = False, level: int = 0) -> None:
         self.input = input_
-        self.frame_chunks = frame_chunks
-        self.chunk_deltatime = chunk_deltatime
+        self.headless = headless  # only build the collision world and player, without any graphics
+        self.physics_step = physics_step
+        # collision tiles above which the map is built in worker processes, never on one core where the pool only adds its startup time
+        self.parallel_build_min_tiles = PARALLEL_BUILD_MIN_TILES if (os.cpu_count() or 1) > 1 else None
+        self.physics_time = 0.0  # frame time not yet simulated
 
         self.level_data = GameData.level_data_dict
-        self.level = 0
+        self.level = level
+        self.tile_image_cache = {}  # raw id -> transformed image
 
         # loading screen
-        self.loading_status = ""
-        self.loading_progress = 0
+        self.progress_queue: Queue[tuple[str | None, int] | Exception | None] = Queue()  # (status, work done), then None or the error
         self.loading_total_work = (
             10  # import cut graphics
             + len(self.level_data[self.level].map[Map.terrain0]) * len((self.level_data[self.level].map[Map.terrain0])[0]) * 7  # build map
-            + (self._get_n_hitboxes() - 1) * self._get_n_hitboxes() / 2  # remove overlap hitboxes
+            + self._get_n_hitboxes()  # build collision world
+            + 10  # bake terrain chunks
             + 1  # set player attribute
         )
-        self.is_loading = True
+        self.phase_times: dict[str, float] = {}  # loading status -> seconds spent in it, e.g. for benchmarks
+        self.phase_start: tuple[str, float] | None = None  # current loading status and when it started
 
         # sprite groups
         self.display_surf = pygame.display.get_surface()
-        self.obstacle_sprites = pygame.sprite.Group()
-        self.loaded_obstacle_sprites = pygame.sprite.Group()
-        map_height = len(self.level_data[self.level].map[Map.terrain0]) * TILE_SIZE
+        self.collision_world = CollisionWorld(TILE_SIZE)
+        self.loaded_rows = range(0)
+        map_height = self.get_map_size()[1]
         self.visible_sprites = SpriteCameraGroup()
-        self.camera = Camera(map_height, self.visible_sprites, self.loaded_obstacle_sprites, self.obstacle_sprites, self)
+        self.camera = Camera(map_height, self.visible_sprites, self.collision_world, self)
 
         # get background images
-        self.background_surfs = self._get_background_surfaces()
+        self.background_surfs = [] if headless else self._get_background_surfaces()
 
     def loading(self):
-        """Time-heavy processes to be done on loading screen."""
+        """Time-heavy processes to be done on loading screen, always ending with a final item on the progress queue."""
+        try:
+            self._load()
+        except Exception as error:
+            self.progress_queue.put(error)  # raised again by the loading screen instead of waiting forever
+            raise
+        self.progress_queue.put(None)
+
+    def _load(self) -> None:
         # create level
-        self.loading_status = "Importing graphics..."
-        self._import_cut_graphics()
-        self.loading_progress += 10
-
-        self.loading_status = "Building map..."
-        self._create_map()
+        self._report("Importing graphics...")
+        if not self.headless:
+            self._import_cut_graphics()
+        self._report(work=10)
+
+        self._report("Building map...")
+        is_cached = self._load_collision_cache()
+        self._create_map(is_cached)
+
+        self._report("Optimising hitboxes...")
+        if not is_cached:
+            self.collision_world.build()
+            self._save_collision_cache()
+        self._report(work=self._get_n_hitboxes())
+
+        self._report("Baking terrain...")
+        if not self.headless:
+            self.visible_sprites.bake_chunks(self.get_map_size())
+        self._report(work=10)
+
+        self._report("Creating player...")
+        self.camera.player = self.player  # set player attribute in camera object
+        self._report(work=1)
 
-        self.loading_status = "Optimising hitboxes..."
-        self._remove_overlap_hitbox()
+        self._report("Done.")
 
-        self.loading_status = "Creating player..."
-        self.camera.player = self.player  # set player attribute in camera object
-        self.loading_progress += 1
+    def _report(self, status: str | None = None, work: int = 0) -> None:
+        """Send loading status and amount of work done to the loading screen, timing each status."""
+        if status is not None:
+            now = perf_counter()
+            if self.phase_start is not None:
+                self.phase_times[self.phase_start[0]] = now - self.phase_start[1]
+            self.phase_start = status, now
+        self.progress_queue.put((status, work))
 
-        self.loading_status = "Done."
-        self.is_loading = False
+    def get_map_size(self) -> tuple[int, int]:
+        """Return map width and height in pixels."""
+        layout = self.level_data[self.level].map[Map.terrain0]
+        return len(layout[0]) * TILE_SIZE, len(layout) * TILE_SIZE
 
     def _get_n_hitboxes(self) -> int:
         n = 0
         for style, layout in self.level_data[self.level].map.items():
             match style:
                 case Map.block_collision | Map.slope_collision | Map.platform_collision:
-                    for row_index, row in enumerate(layout):
-                        for col_index, col in enumerate(row):
-                            if col != '-1':
-                                n += 1
+                    n += int(np.count_nonzero(layout != -1))
         return n
 
     def _import_cut_graphics(self) -> None:
-        self.cut_tile_list = import_cut_graphics('../graphics/levels/level0/images/tileset.png')
+        self.cut_tile_list = import_cut_graphics(self.level_data[self.level].tileset)
+        self.tile_image_cache = {}
 
     def _get_tile_image(self, raw_id: int) -> pygame.Surface:
-        """Return transformed image from id"""
-        # change into unsigned integer with 34 bytes
-        if raw_id < 0:
-            raw_id += 2 ** 32
-        binary_id = format(raw_id, '#034b')  # convert to binary
+        """Return transformed image from id, transforming each distinct id only once."""
+        raw_id &= 0xFFFFFFFF  # change into unsigned 32-bit integer
+        if raw_id in self.tile_image_cache:
+            return self.tile_image_cache[raw_id]
 
-        horizontal, vertical, antidiagonal = tuple(bool(int(i)) for i in binary_id[2:5])  # get rotation info from 3 leading digits
-        tile_id = int(binary_id[6:], 2)  # rest consists of the base id
-        image = self.cut_tile_list[tile_id]  # retrieve image from id
+        # get rotation info from 3 leading bits, the rest consists of the base id
+        horizontal = bool(raw_id & FLIPPED_HORIZONTALLY_FLAG)
+        vertical = bool(raw_id & FLIPPED_VERTICALLY_FLAG)
+        antidiagonal = bool(raw_id & FLIPPED_ANTIDIAGONALLY_FLAG)
+        image = self.cut_tile_list[raw_id & TILE_ID_MASK]  # retrieve image from id
 
         # transform image
-        image = pygame.transform.flip(image, flip_x=horizontal, flip_y=vertical)
+        if horizontal or vertical:
+            image = pygame.transform.flip(image, flip_x=horizontal, flip_y=vertical)
         if antidiagonal:
             # antidiagonal transformation consists of vertical flip and 270-degree rotation
             image = pygame.transform.flip(image, flip_x=False, flip_y=True)
             image = pygame.transform.rotate(image, 90)
+
+        self.tile_image_cache[raw_id] = image
         return image
 
     def _spawn_sprite(self, style: Map, pos: tuple, tile_id: int) -> None:
         """Find which sprite to place."""
         match style:
-            case Map.block_collision:
-                Tile(pos, [self.obstacle_sprites], TileType.block, style)
-            case Map.slope_collision:
-                Tile(pos, [self.obstacle_sprites], TileType.slope_dict[tile_id], style)
-            case Map.platform_collision:
-                Platform(pos, [self.obstacle_sprites], style)
+            case Map.block_collision | Map.slope_collision | Map.platform_collision:
+                self.collision_world.add_tile(pos, get_collision_tile_data(style, tile_id), style)
             case Map.terrain0 | Map.terrain1 | Map.wall:
                 Terrain(pos, [self.visible_sprites], style, self._get_tile_image(tile_id))
             case Map.player:
-                self.player = Player((pos[0] + TILE_SIZE / 2, pos[1] + TILE_SIZE), self.loaded_obstacle_sprites, self.input)
-
-    def _create_map(self) -> None:
-        """Iterate through maps and place sprites."""
-        for style, layout in self.level_data[self.level].map.items():
+                self._spawn_player((pos[0] + TILE_SIZE / 2, pos[1] + TILE_SIZE))
+
+    def _spawn_player(self, pos: tuple[float, float]) -> None:
+        self.spawn_pos = pos
+        self.player = Player(pos, self.collision_world, self.input, self.headless)
+
+    def _load_collision_cache(self) -> bool:
+        """Restore collision world and player spawn from the level cache file, if it matches the level."""
+        cache_path = get_collision_cache_path(self.level_data.get_level_path(self.level))
+        if not os.path.exists(cache_path):
+            return False
+
+        try:
+            with np.load(cache_path) as cache:
+                if int(cache['version']) != COLLISION_CACHE_VERSION or str(cache['key']) != get_collision_cache_key(self.level_data[self.level].map):
+                    return False
+                arrays = {name: cache[name] for name in self.collision_world.get_arrays()}
+                n_tiles = int(cache['n_tiles'])
+                spawn_pos = tuple(cache['spawn_pos'].tolist())
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            return False  # damaged, rebuilt and written again
+
+        self.collision_world.set_arrays(arrays)
+        self.collision_world.n_tiles = n_tiles
+        self._spawn_player(spawn_pos)
+        return True
+
+    def _save_collision_cache(self) -> None:
+        """Write built collision world and player spawn next to the level, keyed by its content."""
+        cache_path = get_collision_cache_path(self.level_data.get_level_path(self.level))
+        if not os.path.isdir(os.path.dirname(cache_path)):
+            return  # level was not loaded from disk
+        try:
+            save_npz(
+                cache_path,
+                version=COLLISION_CACHE_VERSION,
+                key=get_collision_cache_key(self.level_data[self.level].map),
+                n_tiles=self.collision_world.n_tiles,
+                spawn_pos=np.array(self.spawn_pos, dtype=np.float64),
+                **self.collision_world.get_arrays()
+            )
+        except OSError:
+            pass  # the cache is only an optimisation, e.g. on a read-only install
+
+    def _create_map(self, is_cached: bool = False) -> None:
+        """Iterate through maps and place sprites, skipping the collision world and player if they were cached."""
+        level_map = self.level_data[self.level].map
+        skipped_styles = set()
+        if self.headless:
+            skipped_styles.update(TERRAIN_STYLES)  # no graphics when headless
+        if is_cached:
+            skipped_styles.update((*COLLISION_STYLES, Map.player))
+
+        is_parallel = not is_cached and self.parallel_build_min_tiles is not None and self._get_n_hitboxes() >= self.parallel_build_min_tiles
+        if is_parallel:
+            self._build_collision_regions({style: level_map[style] for style in COLLISION_STYLES if style in level_map})
+
+        for style, layout in level_map.items():
+            if style in skipped_styles:
+                self._report(work=layout.size)
+                continue
+            if is_parallel and style in COLLISION_STYLES:
+                continue
             for row_index, row in enumerate(layout):
-                for col_index, col in enumerate(row):
-                    self.loading_progress += 1
-                    if col != '-1':
-                        x = col_index * TILE_SIZE
-                        y = row_index * TILE_SIZE
-                        self._spawn_sprite(style, (x, y), int(col))
-
-    def _remove_overlap_hitbox(self) -> None:
-        """Remove overlapping hitboxes for optimization."""
-        for a, b in combinations(self.obstacle_sprites, 2):
-            self.loading_progress += 1
-            list_a = a.line_list.copy()
-            list_b = b.line_list.copy()
-
-            for line_a in list_a:
-                for line_b in list_b:
-                    if set(line_a.coords) == set(line_b.coords):
-                        a.line_list.remove(line_a)
-                        del line_a
-                        b.line_list.remove(line_b)
-                        del line_b
-                        break
-            # kill sprite if no line hitboxes
-            if not b.line_list:
-                b.kill()
-            if not a.line_list:
-                a.kill()
+                self._report(work=len(row))
+                for col_index in np.flatnonzero(row != -1).tolist():
+                    x = col_index * TILE_SIZE
+                    y = row_index * TILE_SIZE
+                    self._spawn_sprite(style, (x, y), int(row[col_index]))
+
+    def _build_collision_regions(self, layouts: dict[Map, np.ndarray]) -> None:
+        """Collect collision tile edges from horizontal bands of the map in worker processes."""
+        n_rows = len(next(iter(layouts.values())))
+        n_regions = min(os.cpu_count() or 1, n_rows)
+        bounds = np.linspace(0, n_rows, n_regions + 1).astype(int).tolist()
+
+        # spawn, as forking this multithreaded process while the main thread is inside SDL can deadlock the workers
+        with ProcessPoolExecutor(n_regions, mp_context=multiprocessing.get_context('spawn')) as executor:
+            futures = {}
+            n_tiles = self.collision_world.n_tiles
+            for i, (first_row, last_row) in enumerate(zip(bounds, bounds[1:])):
+                region = {style: layout[first_row:last_row] for style, layout in layouts.items()}
+                futures[executor.submit(_build_region, region, first_row, n_tiles)] = i
+                n_tiles += sum(int(np.count_nonzero(layout != -1)) for layout in region.values())
+
+            results = [[] for _ in range(n_regions)]
+            for future in as_completed(futures):
+                i = futures[future]
+                results[i] = future.result()
+                self._report(work=sum(layout[bounds[i]:bounds[i + 1]].size for layout in layouts.values()))
+
+        # add in region order for a deterministic build, edges shared across bands are removed in build
+        for segments in results:
+            self.collision_world.add_segments(segments)
+        self.collision_world.n_tiles = n_tiles
 
     def _get_background_surfaces(self) -> list[pygame.Surface]:
         """Return a list of instantiates images."""
@@ -146,27 +297,54 @@ class Level:
 
     def unload_hitboxes(self):
         """Delete all hitboxes"""
-        for sprite in self.loaded_obstacle_sprites:
-            sprite.remove(self.loaded_obstacle_sprites)
+        self.collision_world.unload_lines()
+        self.loaded_rows = range(0)
+
+    @staticmethod
+    def _get_row_difference(a: range, b: range):
+        """Yield rows in range a which are not in range b."""
+        yield from range(a.start, min(a.stop, b.start))
+        yield from range(max(a.start, b.stop), a.stop)
 
     def reload_hitboxes(self, y1, y2) -> None:
         """Reload hitboxes with arguments of screen height relative to tile size."""
-        self.unload_hitboxes()
-        # Add all obstacle sprites in a y range to loaded obstacle sprites
-        for sprite in self.obstacle_sprites:
-            if y2 < sprite.pos[1] < y1:
-                sprite.add(self.loaded_obstacle_sprites)
+        # rows with y2 < row * TILE_SIZE < y1
+        rows = range(floor(y2 / TILE_SIZE) + 1, ceil(y1 / TILE_SIZE))
 
-    def draw(self) -> None:
-        for image in self.background_surfs:
-            self.display_surf.blit(image, (0, 0))
-        self.camera.draw_sprites()
-        self.player.draw()
+        # only update rows leaving and entering the window
+        for row in self._get_row_difference(self.loaded_rows, rows):
+            self.collision_world.unload_row(row)
+        for row in self._get_row_difference(rows, self.loaded_rows):
+            self.collision_world.load_row(row)
+        self.loaded_rows = rows
 
-    def update(self) -> None:
-        """Draw and update sprites."""
-        self.camera.update()
-        self.player.update(self.frame_chunks, self.chunk_deltatime)
+    def draw(self) -> None:
+        with profiler.measure('draw backgrounds'):
+            for image in self.background_surfs:
+                self.display_surf.blit(image, (0, 0))
+        with profiler.measure('draw terrain'):
+            self.camera.draw_sprites()
+        with profiler.measure('draw player'):
+            self.player.draw()
+
+    def update(self, frame_time: float) -> None:
+        """Run fixed physics steps for the elapsed frame time and update the camera."""
+        self.physics_time += frame_time
+        steps = 0
+        while self.physics_time >= self.physics_step and steps < MAX_PHYSICS_STEPS:
+            with profiler.measure('update camera'):
+                self.camera.update()  # load hitboxes around the player before it moves
+            with profiler.measure('update physics'):
+                self.player.update(self.physics_step)
+            self.physics_time -= self.physics_step
+            steps += 1
+
+        # drop time that could not be caught up on
+        self.physics_time = min(self.physics_time, self.physics_step)
+
+        self.player.interpolation = self.physics_time / self.physics_step
+        with profiler.measure('update camera'):
+            self.camera.update()  # follow the interpolated position
 
 
 class SpriteCameraGroup(pygame.sprite.Group):
@@ -174,19 +352,44 @@ class SpriteCameraGroup(pygame.sprite.Group):
         super().__init__()
         self.display_surf = pygame.display.get_surface()
 
-    def custom_draw(self, camera_offset: float) -> None:
-        """Draws each sprite with an offset."""
+        # static sprites pre-rendered into horizontal strips of one screen height
+        self.chunk_height = get_screen_size()[1]
+        self.chunks: list[tuple[pygame.Surface, int]] = []  # (surface, y)
+
+    def bake_chunks(self, map_size: tuple[int, int]) -> None:
+        """Render all sprites into chunk surfaces in drawing order."""
+        map_width, map_height = map_size
+        self.chunks = [
+            (pygame.Surface((map_width, min(self.chunk_height, map_height - y)), pygame.SRCALPHA).convert_alpha(), y)
+            for y in range(0, map_height, self.chunk_height)
+        ]
         for sprite in self.sprites():
-            surf = sprite.image
-            sprite_offset = sprite.rect.topleft - camera_offset
-            self.display_surf.blit(surf, sprite_offset)
+            # sprites may straddle the border between two chunks
+            for index in range(sprite.rect.top // self.chunk_height, (sprite.rect.bottom - 1) // self.chunk_height + 1):
+                if 0 <= index < len(self.chunks):
+                    chunk_surf, y = self.chunks[index]
+                    chunk_surf.blit(sprite.image, (sprite.rect.x, sprite.rect.y - y))
+
+    def custom_draw(self, camera_offset: pygame.Vector2) -> None:
+        """Draws chunks in view with an offset, or each sprite if no chunks are baked."""
+        if not self.chunks:
+            for sprite in self.sprites():
+                surf = sprite.image
+                sprite_offset = sprite.rect.topleft - camera_offset
+                self.display_surf.blit(surf, sprite_offset)
+            return
+
+        view_top = camera_offset.y
+        view_bottom = camera_offset.y + self.chunk_height
+        for chunk_surf, y in self.chunks:
+            if y < view_bottom and y + chunk_surf.get_height() > view_top:
+                self.display_surf.blit(chunk_surf, (-camera_offset.x, y - camera_offset.y))
 
 
 class Camera:
-    def __init__(self, map_height: int, visible_sprites: pygame.sprite.Group, loaded_obstacle_sprites: pygame.sprite.Group, obstacle_sprites: pygame.sprite.Group, level: Level) -> None:
+    def __init__(self, map_height: int, visible_sprites: pygame.sprite.Group, collision_world: CollisionWorld, level: Level) -> None:
         self.visible_sprites = visible_sprites
-        self.loaded_obstacle_sprites = loaded_obstacle_sprites
-        self.obstacle_sprites = obstacle_sprites
+        self.collision_world = collision_world
         self.level = level
 
         self.setup_init_hitboxes = False
@@ -195,9 +398,8 @@ class Camera:
 
         # display setup
         self.display_surf = pygame.display.get_surface()
-        self.screen_width = self.display_surf.get_width()
+        self.screen_width, self.screen_height = get_screen_size()
         self.screen_half_width = self.screen_width // 2
-        self.screen_height = self.display_surf.get_height()
         self.screen_half_height = self.screen_height // 2
 
         # camera setup
@@ -226,18 +428,17 @@ class Camera:
 
     def draw_hitboxes(self) -> None:
         """Draw hitboxes to display surface with camera offset."""
-        for sprite in self.loaded_obstacle_sprites:
-            for line in sprite.line_list:
-                pygame.draw.line(
-                    self.display_surf,
-                    (255, 0, 0),
-                    line.coords[0] - self.offset,
-                    line.coords[1] - self.offset
-                )
+        for line in self.collision_world.get_loaded_lines():
+            pygame.draw.line(
+                self.display_surf,
+                (255, 0, 0),
+                line.coords[0] - self.offset,
+                line.coords[1] - self.offset
+            )
 
     def _move_camera(self) -> None:
         """Move camera to player if player is on ground or beneath threshold."""
-        self.offset.y = min(max(self.player.rect.centery - self.screen_half_height, 0), self.map_height - self.screen_height)
+        self.offset.y = min(max(self.player.get_render_pos().y - self.screen_half_height, 0), self.map_height - self.screen_height)
         # if self.player.is_on_ground or self.player.offset.y > self.follow_threshold_top:
         #     target_y = min(max(self.player.rect.centery - self.half_height, 0), self.map_height - self.height)
         #     diff_y = target_y - self.offset.y
@@ -253,10 +454,10 @@ class Camera:
         """Update camera position and hitbox positions."""
         if self.player is not None:
             self._move_camera()
-            self.player.offset = self.player.pos - self.offset
+            self.player.offset = self.player.get_render_pos() - self.offset
 
             # init hitboxes after level is initialized
-            if not self.setup_init_hitboxes and self.obstacle_sprites.sprites():
+            if not self.setup_init_hitboxes and len(self.collision_world):
                 self.setup_init_hitboxes = True
                 self._set_hitbox_range()
                 self._call_reload_hitboxes()
@@ -1,5 +1,7 @@
 import pygame
 import sys
+from queue import Empty
+from settings import FPS
 from level import Level
 
 
@@ -7,6 +9,9 @@ class LoadingScreen:
     def __init__(self, level: Level) -> None:
         self.level = level
         self.is_loading = True
+        self.status = ""
+        self.progress = 0
+        self.clock = pygame.time.Clock()
 
         self.display_surf = pygame.display.get_surface()
         self.font = pygame.font.SysFont("Roboto", 30)
@@ -34,17 +39,34 @@ class LoadingScreen:
             pygame.Rect(
                 self.loading_bar_rect.topleft[0] + self.loading_bar_padding,
                 self.loading_bar_rect.topleft[1] + self.loading_bar_padding,
-                (self.loading_bar_rect.width - self.loading_bar_padding * 2) * (self.level.loading_progress / self.level.loading_total_work),
+                (self.loading_bar_rect.width - self.loading_bar_padding * 2) * (self.progress / self.level.loading_total_work),
                 (self.loading_bar_rect.height - self.loading_bar_padding * 2)
             )
         )
         # progress text
-        if self.current_text != self.level.loading_status:
-            self.current_text = self.level.loading_status
+        if self.current_text != self.status:
+            self.current_text = self.status
             self.text = self.font.render(self.current_text, True, self.text_colour)
             self.text_rect = self.text.get_rect(center=(self.display_surf.get_width() / 2 + self.text_offset[0], self.display_surf.get_height() / 2 + self.text_offset[1]))
         self.display_surf.blit(self.text, self.text_rect)
 
+    def _get_progress(self) -> None:
+        """Apply all progress reported by the level since the last frame."""
+        while True:
+            try:
+                update = self.level.progress_queue.get_nowait()
+            except Empty:
+                return
+            if update is None:
+                self.is_loading = False
+                return
+            if isinstance(update, Exception):
+                raise RuntimeError("Loading the level failed") from update
+            status, work = update
+            if status is not None:
+                self.status = status
+            self.progress += work
+
     def run(self) -> None:
         while True:
             for event in pygame.event.get():
@@ -52,9 +74,11 @@ class LoadingScreen:
                     pygame.quit()
                     sys.exit()
 
-            if not self.level.is_loading:
+            self._get_progress()
+            if not self.is_loading:
                 break
 
             self.display_surf.fill(self.background_colour)
             self._draw()
             pygame.display.flip()
+            self.clock.tick(FPS)  # leave the loading thread the rest of the frame
@@ -1,18 +1,19 @@
-import sys
+import argparse
 import pygame
 from settings import *
 from level import Level
-from input import Input
+from input import Input, save_recording, load_recording
 from typing import Callable
 from cursor import Cursor, CursorType
 from loading_screen import LoadingScreen
 from threading import Thread
 from menu import Menu
+from profiler import profiler
 
 
 class Game:
     """Control game processes."""
-    def __init__(self) -> None:
+    def __init__(self, record_path: str | None = None, replay_path: str | None = None) -> None:
         # general setup
         pygame.init()
         flags = pygame.HWSURFACE | pygame.DOUBLEBUF | pygame.SCALED
@@ -20,22 +21,24 @@ class Game:
         self.clock = pygame.time.Clock()
         pygame.display.set_caption('Golf Game')
 
-        # split player calculations into chunks
-        frame_chunks = 1
-        chunk_deltatime = (1 / FPS) / frame_chunks
+        # input recording and replay
+        self.record_path = record_path
+        self.input = Input(load_recording(replay_path) if replay_path is not None else None)
+        if record_path is not None:
+            self.input.start_recording()
 
-        self.input = Input()
         self.menu = Menu()
         self.cursor = Cursor(self.input)
         pygame.mouse.set_cursor(self.cursor)
-        self.level = Level(self.input, frame_chunks, chunk_deltatime)
+        self.level = Level(self.input, 1 / FPS)
         self.loading_screen = LoadingScreen(self.level)
 
         self.is_running = True
         self.commands: dict[int: Callable] = {
             pygame.K_q: self.stop,
             pygame.K_h: self.toggle_hitboxes,
-            pygame.K_r: self.restart
+            pygame.K_r: self.restart,
+            pygame.K_F3: profiler.toggle
         }
 
     def stop(self) -> None:
@@ -50,33 +53,47 @@ class Game:
     def _run(self) -> None:
         """Game loop."""
         while self.is_running:
-            event_list = pygame.event.get()
-            for event in event_list:
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                if event.type == pygame.KEYDOWN:
-                    if event.key in self.commands:
-                        self.commands[event.key]()  # call function
+            frame_time = self.clock.tick(FPS) / 1000
+
+            with profiler.measure('events'):
+                event_list = pygame.event.get()
+                for event in event_list:
+                    if event.type == pygame.QUIT:
+                        self.stop()
 
             self.screen.fill('Black')
 
-            self.input.update(event_list)  # input
+            with profiler.measure('input'):
+                self.input.update(event_list, frame_time)  # input
+                if self.input.is_replay_finished:
+                    self.stop()
+                    break
+                for key in self.input.keys:
+                    if key in self.commands:
+                        self.commands[key]()  # call function
 
             if not self.input.is_paused:
-                self.cursor.update()  # cursor
-                pygame.mouse.set_cursor(self.cursor)
-                self.level.update()  # level
+                with profiler.measure('cursor'):
+                    self.cursor.update()  # cursor
+                    pygame.mouse.set_cursor(self.cursor)
+                self.level.update(self.input.frame_time)  # level
+                self.menu.paused.clear_cache()
 
-            self.level.draw()
+            # the paused menu covers the frozen level with a cached blurred copy
+            if not (self.input.is_paused and self.menu.paused.is_cached()):
+                self.level.draw()
 
             if self.input.is_paused:
-                self.cursor.set_image(CursorType.DEFAULT)
-                pygame.mouse.set_cursor(self.cursor)
-                self.menu.paused.draw()
+                with profiler.measure('menu'):
+                    self.cursor.set_image(CursorType.DEFAULT)
+                    pygame.mouse.set_cursor(self.cursor)
+                    self.menu.paused.draw()
 
-            pygame.display.flip()
-            self.clock.tick(FPS)
+            with profiler.measure('profiler'):
+                profiler.draw()
+            with profiler.measure('flip'):
+                pygame.display.flip()
+            profiler.end_frame()
 
     def _load(self):
         """Load game objects."""
@@ -91,6 +108,7 @@ class Game:
         self.player = self.level.player
         self.cursor.player = self.player
         pygame.event.set_grab(True)
+        self.clock.tick()  # start timing frames now, or the first frame would contain the whole loading time
 
     def start(self) -> None:
         """Start game."""
@@ -101,9 +119,16 @@ class Game:
             print('Interrupted by Ctrl+C')
 
         # cleanup
+        if self.record_path is not None:
+            save_recording(self.record_path, self.input.recording)
         pygame.quit()
 
 
 if __name__ == '__main__':
-    game = Game()
+    parser = argparse.ArgumentParser(description="Golf Game")
+    parser.add_argument('--record', help="file to record input to")
+    parser.add_argument('--replay', help="file to replay recorded input from")
+    args = parser.parse_args()
+
+    game = Game(args.record, args.replay)
     game.start()
@@ -1,5 +1,4 @@
 import pygame
-from PIL import Image, ImageFilter
 
 
 class Menu:
@@ -13,12 +12,25 @@ class Menu:
             self.screen_height = self.display_surf.get_height()
 
             self.blur_magnitude = 2
+            self.blurred_surf = None  # frozen frame blurred once on pause
 
-        def blur(self, magnitude: float) -> None:
-            data = pygame.image.tostring(self.display_surf, 'RGBA')
-            blured = Image.frombytes('RGBA', (self.screen_width, self.screen_height), data).filter(ImageFilter.GaussianBlur(radius=magnitude))
-            image = pygame.image.frombuffer(blured.tobytes('raw', 'RGBA'), (self.screen_width, self.screen_height), 'RGBA')
-            self.display_surf.blit(image, (0, 0))
+        def blur(self, surf: pygame.Surface, magnitude: float) -> pygame.Surface:
+            """Return a blurred copy of a surface by scaling it down and back up."""
+            scale = 1 / (magnitude * 2)
+            small_size = (max(1, int(surf.get_width() * scale)), max(1, int(surf.get_height() * scale)))
+            small_surf = pygame.transform.smoothscale(surf, small_size)
+            return pygame.transform.smoothscale(small_surf, surf.get_size())
+
+        def is_cached(self) -> bool:
+            """Return whether a blurred frame for the current display size exists."""
+            return self.blurred_surf is not None and self.blurred_surf.get_size() == self.display_surf.get_size()
+
+        def clear_cache(self) -> None:
+            self.blurred_surf = None
 
         def draw(self) -> None:
-            self.blur(self.blur_magnitude)
+            # the frame underneath is frozen while paused, so only blur it once
+            if not self.is_cached():
+                self.display_surf = pygame.display.get_surface()
+                self.blurred_surf = self.blur(self.display_surf, self.blur_magnitude)
+            self.display_surf.blit(self.blurred_surf, (0, 0))
@@ -1,11 +1,13 @@
 import pygame
-from math import copysign, sqrt, atan2, sin, cos, degrees, radians
-from settings import GRAVITY
+from math import ceil, copysign, sqrt, atan2, sin, cos, degrees, radians
+from settings import GRAVITY, TILE_SIZE, MAX_SUBSTEPS, COLLISION_BACKEND, CONTINUOUS_COLLISION, BROAD_PHASE
 from game_data import Map
-import shapely.geometry
 from enum import Enum, auto
 from tile import LineHitbox
 from input import Input
+from helper import get_screen_size
+from profiler import profiler
+from collision import CollisionWorld, HITBOX_BACKENDS, AnalyticHitbox, ShapelyHitbox, circle_segment_time_of_impact, point_segment_distance_sq
 
 
 class Direction(Enum):
@@ -15,9 +17,11 @@ class Direction(Enum):
 
 class Player(pygame.sprite.Sprite):
     """Controls all player functions."""
-    def __init__(self, pos: tuple, loaded_obstacle_sprites: pygame.sprite.Group, input_: Input) -> None:
+    def __init__(self, pos: tuple, collision_world: CollisionWorld, input_: Input, headless: bool = False) -> None:
         super().__init__()
-        self.image = pygame.image.load('../graphics/player/ball.png').convert_alpha()
+        self.image = pygame.image.load('../graphics/player/ball.png')
+        if not headless:
+            self.image = self.image.convert_alpha()
         self.rect = self.image.get_rect(midbottom=pos)
         self.radius = self.rect.width / 2
         self.original_pos = self.rect.center
@@ -25,24 +29,29 @@ class Player(pygame.sprite.Sprite):
         self.input = input_
 
         # general setup
-        self.loaded_obstacle_sprites = loaded_obstacle_sprites
-        self.display_surf = pygame.display.get_surface()
-        self.screen_height = self.display_surf.get_height()
-        self.screen_width = self.display_surf.get_width()
+        self.collision_world = collision_world
+        self.hitbox_class = HITBOX_BACKENDS[COLLISION_BACKEND]
+        self.display_surf = pygame.display.get_surface()  # None when headless
+        self.screen_width, self.screen_height = get_screen_size()
 
         # player attributes
         self.speed = 0.3
         self.default_jumps = 2
         self.shoot_multiplier = 60
         self.mass = 1
+        self.rotation_step = 2  # degrees between cached rotated images
+        self.rotation_cache: dict[float, tuple[pygame.Surface, tuple[float, float]]] = {}
 
         self.offset = pygame.Vector2()  # controlled by camera
-        self.prev_pos = pygame.Vector2()
+        self.prev_pos = pygame.Vector2(self.pos)  # position before the last substep
+        self.step_start_pos = pygame.Vector2(self.pos)  # position before the last physics step
+        self.interpolation = 1.0  # fraction of the next physics step already elapsed, set by level
         self.velocity = pygame.Vector2()
         self.roll_velocity = pygame.Vector2()
         self.n_jumps = 0
         self.can_jump = False
         self.is_on_ground = False
+        self.is_sleeping = False  # resting on flat ground, physics skipped until shot or reset
 
         self._setup()
 
@@ -53,6 +62,7 @@ class Player(pygame.sprite.Sprite):
 
         self.can_jump = True
         self.is_on_ground = False
+        self.is_sleeping = False
 
         self.rotation = 0
         self.rotation_vel = 0
@@ -69,7 +79,8 @@ class Player(pygame.sprite.Sprite):
         self.pos += self.roll_velocity * delta_time
         self.rotation += self.rotation_vel
 
-        self._collision(delta_time)  # collision logic
+        with profiler.measure('update physics: collision'):
+            self._collision(delta_time)  # collision logic
         self.death()  # check for death
         self.rect.center = self.pos  # update sprite position
 
@@ -78,50 +89,77 @@ class Player(pygame.sprite.Sprite):
         if self.offset.y > self.screen_height and (self.offset.x < 0 or self.offset.x > self.screen_width) or force:
             # reset everything
             self.pos.update(self.original_pos)
+            self.prev_pos.update(self.pos)
+            self.step_start_pos.update(self.pos)
             self._setup()
 
-    def _get_hitbox(self) -> shapely.geometry.Point:
-        return shapely.geometry.Point(self.pos).buffer(self.radius)
+    def get_render_pos(self) -> pygame.Vector2:
+        """Return position interpolated between the last two physics steps."""
+        return self.step_start_pos.lerp(self.pos, self.interpolation)
+
+    def _get_hitbox(self) -> AnalyticHitbox | ShapelyHitbox:
+        """Return circle and trail hitbox from the selected collision backend."""
+        return self.hitbox_class(self.pos, self.prev_pos, self.radius, CONTINUOUS_COLLISION)
+
+    def _get_swept_rect(self) -> tuple[float, float, float, float]:
+        """Return bounding rectangle of the circle swept from previous to current position."""
+        return (
+            min(self.prev_pos.x, self.pos.x) - self.radius,
+            min(self.prev_pos.y, self.pos.y) - self.radius,
+            max(self.prev_pos.x, self.pos.x) + self.radius,
+            max(self.prev_pos.y, self.pos.y) + self.radius
+        )
+
+    def _get_candidate_lines(self) -> list[tuple[LineHitbox, float]]:
+        """Return lines the player may collide with this step and their collision scores."""
+        if BROAD_PHASE == 'numpy':
+            indices, scores = self.collision_world.sweep(self.prev_pos, self.pos, self.radius, self.velocity, CONTINUOUS_COLLISION)
+            return [(self.collision_world.get_line(i), score) for i, score in zip(indices.tolist(), scores.tolist())]
+
+        candidates = []
+        for line in self.collision_world.query(*self._get_swept_rect()):
+            if line.tile_type == Map.platform_collision:
+                # platforms only collide from above
+                if self.velocity.y <= 0 or self.prev_pos.y + self.radius >= line.coords[0][1]:
+                    continue
+
+            if CONTINUOUS_COLLISION and self._is_leaving(line):
+                continue  # e.g. when shot off the ground
+
+            candidates.append((line, self._get_collision_score(line.normal_vect)))
+        return candidates
+
+    def _is_leaving(self, line: LineHitbox) -> bool:
+        """Return whether the player starts the step touching a line and moves strictly away from it."""
+        return (
+            (self.pos - self.prev_pos).dot(line.normal_vect) > 0
+            and point_segment_distance_sq(self.prev_pos, *line.coords) <= self.radius ** 2
+        )
 
     def _collision(self, delta_time: float) -> None:
         """Handle collision logic."""
         # prev_pos = self.pos - ((self.velocity + self.roll_velocity) * delta_time)
 
         player_hitbox = self._get_hitbox()
-        trail_hitbox = shapely.geometry.LineString((self.pos, self.prev_pos))
 
-        collision_sprites = []
         collision_lines = []
         max_score = 0
-        max_score_data = ()  # (sprite, line)
-
-        for sprite in self.loaded_obstacle_sprites:
-            match sprite.type:
-                case Map.platform_collision:
-                    line = sprite.line_list[0]
-
-                    if self.velocity.y > 0 and (player_hitbox.intersects(line.hitbox) or trail_hitbox.intersects(line.hitbox)) and self.prev_pos.y + self.radius < sprite.y:
-                        collision_sprites.append(sprite)
-                        collision_lines.append(line)
-                        score = self._get_collision_score(line.normal_vect)
-                        if score > max_score:
-                            max_score = score
-                            max_score_data = (sprite, line)
-                case _:
-                    if player_hitbox.intersects(sprite.hitbox) or trail_hitbox.intersects(sprite.hitbox):
-                        collision_sprites.append(sprite)
-                        for line in sprite.line_list:
-                            if player_hitbox.intersects(line.hitbox) or trail_hitbox.intersects(line.hitbox):
-                                collision_lines.append(line)
-                                score = self._get_collision_score(line.normal_vect)
-                                if score > max_score:
-                                    max_score = score
-                                    max_score_data = (sprite, line)
-
-        if max_score_data:
+        max_score_line = None
+
+        for line, score in self._get_candidate_lines():
+            if player_hitbox.intersects_line(line):
+                collision_lines.append(line)
+                if score > max_score:
+                    max_score = score
+                    max_score_line = line
+
+        if max_score_line is not None:
             # collision logic
-            self._exit_tile(collision_sprites)
-            self._bounce(delta_time, max_score_data[0], max_score_data[1], collision_lines)
+            if CONTINUOUS_COLLISION:
+                self._move_to_impact(collision_lines)
+            else:
+                self._exit_tile(collision_lines)
+            self._bounce(delta_time, max_score_line, collision_lines)
             self._set_rotation_vel(delta_time)
         else:
             # convert roll velocity to actual velocity
@@ -144,7 +182,7 @@ class Player(pygame.sprite.Sprite):
         x = x * -1 if is_flipped else x
         self.roll_velocity += x, y
 
-    def _bounce(self, delta_time: float, sprite: pygame.sprite.Sprite, line: LineHitbox, lines: list[LineHitbox]) -> None:
+    def _bounce(self, delta_time: float, line: LineHitbox, lines: list[LineHitbox]) -> None:
         """Find vector to reflect velocity."""
         roll = False
 
@@ -154,7 +192,7 @@ class Player(pygame.sprite.Sprite):
             if line_angle != 0:
                 for p in line.coords:
                     vect = self.pos - p
-                    if vect.magnitude() < self.radius:
+                    if vect.magnitude() < self.radius + 1e-6:  # time of impact leaves the circle exactly touching
                         # find angle
                         is_flipped = True if vect.x < 0 else False
                         angle = degrees(atan2(-vect.y, abs(vect.x)))
@@ -168,14 +206,15 @@ class Player(pygame.sprite.Sprite):
             self.roll_velocity.update()  # set to (0, 0)
             self.velocity.update()  # set to (0, 0)
             self.is_on_ground = True
+            self.is_sleeping = True
             self.reset_jumps()
         else:
             # reflect velocity
             self.velocity = self.velocity.reflect(line.normal_vect)
 
             # apply bounciness if below threshold
-            self.velocity.x -= self.velocity.x * (1 - sprite.bounciness) * abs(line.normal_vect.x)
-            self.velocity.y -= self.velocity.y * (1 - sprite.bounciness) * abs(line.normal_vect.y)
+            self.velocity.x -= self.velocity.x * (1 - line.bounciness) * abs(line.normal_vect.x)
+            self.velocity.y -= self.velocity.y * (1 - line.bounciness) * abs(line.normal_vect.y)
 
     def _get_collision_score(self, normal_vect) -> float:
         """Return score based on angle between velocity and line normal vector."""
@@ -183,10 +222,26 @@ class Player(pygame.sprite.Sprite):
         angle = angle if angle > 0 else angle + 360  # make angle positive
         return 1 - abs(1 - (angle / 180))
 
-    def _exit_tile(self, sprites: list[pygame.sprite.Sprite]) -> None:
-        """Move player out of tile sprites."""
+    def _move_to_impact(self, lines: list[LineHitbox]) -> None:
+        """Move player back along its path to the first point of contact with lines."""
+        if self.velocity.magnitude() == 0 or not lines:
+            return
+
+        impact_times = []
+        for line in lines:
+            if (self.pos - self.prev_pos).dot(line.normal_vect) >= 0:
+                continue  # not approaching, e.g. a wall the player slides along, but kept for bouncing
+            time = circle_segment_time_of_impact(self.prev_pos, self.pos, self.radius, *line.coords)
+            if time is not None:
+                impact_times.append(time)
+
+        if impact_times:
+            self.pos = self.prev_pos.lerp(self.pos, min(impact_times))
+
+    def _exit_tile(self, lines: list[LineHitbox]) -> None:
+        """Move player out of collision lines."""
         player_hitbox = self._get_hitbox()
-        if self.velocity.magnitude() == 0 or not sprites:
+        if self.velocity.magnitude() == 0 or not lines:
             return
 
         n_steps = 10
@@ -198,42 +253,45 @@ class Player(pygame.sprite.Sprite):
         for _ in range(n_steps):
             step /= 2
 
-            collision = False
-            for sprite in sprites:
-                if player_hitbox.intersects(sprite.hitbox):
-                    collision = True
+            # with shared tile edges removed, a circle deep inside terrain touches no line
+            collision = any(player_hitbox.circle_intersects_line(line) for line in lines) or self.collision_world.contains_point(self.pos)
 
             self.pos = self.pos + step if collision else self.pos - step
             player_hitbox = self._get_hitbox()
         self.pos += step
 
+    def _get_rotated_image(self) -> tuple[pygame.Surface, tuple[float, float]]:
+        """Return rotated image and its half size, cached by rotation quantized to rotation_step."""
+        angle = round(self.rotation / self.rotation_step) * self.rotation_step % 360  # at most 360 / rotation_step keys
+        if angle not in self.rotation_cache:
+            rotated_image = pygame.transform.rotate(self.image, angle)
+            self.rotation_cache[angle] = (rotated_image, (rotated_image.get_width() / 2, rotated_image.get_height() / 2))
+        return self.rotation_cache[angle]
+
     def _draw(self) -> None:
         """Draw a rotated sprite to the screen."""
-        origin_pos = self.image.get_width() / 2, self.image.get_height() / 2
-        image_rect = self.image.get_rect(topleft=(self.offset[0] - origin_pos[0], self.offset[1] - origin_pos[1]))
-        offset_center_to_pivot = pygame.Vector2(self.offset[0], self.offset[1]) - image_rect.center
-        rotated_offset = offset_center_to_pivot.rotate(-self.rotation)
-        rotated_image_center = (self.offset[0] - rotated_offset.x, self.offset[1] - rotated_offset.y)
-        rotated_image = pygame.transform.rotate(self.image, self.rotation)
-        rotated_image_rect = rotated_image.get_rect(center=rotated_image_center)
-        self.display_surf.blit(rotated_image, rotated_image_rect)
+        # the image rotates about its centre, so the rotated image stays centred on the player
+        rotated_image, half_size = self._get_rotated_image()
+        self.display_surf.blit(rotated_image, (self.offset[0] - half_size[0], self.offset[1] - half_size[1]))
 
     def reset_jumps(self) -> None:
         """Reset jumps."""
         self.can_jump = True
         self.n_jumps = self.default_jumps
 
-    def shoot(self) -> None:
-        """Shoot player using relative position of mouse from player."""
+    def shoot(self, offset: tuple[float, float] | None = None) -> None:
+        """Shoot player using relative position of mouse from player, or a given offset."""
         self.is_on_ground = False
+        self.is_sleeping = False
         self.can_jump = False
         self.n_jumps -= 1
 
         min_length = 0
 
         # Set velocity by mouse position
-        dx = (self.input.mouse.pos.x - self.offset.x)
-        dy = (self.input.mouse.pos.y - self.offset.y)
+        if offset is None:
+            offset = self.input.mouse.pos - self.offset
+        dx, dy = offset
 
         if sqrt(dx ** 2 + dy ** 2) > min_length:
             self.velocity = pygame.Vector2(
@@ -245,7 +303,20 @@ class Player(pygame.sprite.Sprite):
         """Draw player to display surface."""
         self._draw()
 
-    def update(self, chunks: int, delta_time: float) -> None:
-        """Handle player actions per frame."""
-        for _ in range(chunks):
-            self._move(delta_time)
+    def _get_substeps(self, delta_time: float) -> int:
+        """Return number of substeps needed to move at most a radius or half a tile per substep."""
+        distance = (self.velocity + self.roll_velocity).length() * delta_time
+        max_distance = min(self.radius, TILE_SIZE / 2)
+        return min(max(ceil(distance / max_distance), 1), MAX_SUBSTEPS)
+
+    def update(self, delta_time: float) -> None:
+        """Handle player actions per physics step."""
+        self.step_start_pos.update(self.pos)
+        if self.is_sleeping:
+            return
+
+        substeps = self._get_substeps(delta_time)
+        for _ in range(substeps):
+            self._move(delta_time / substeps)
+            if self.is_sleeping:
+                break
@@ -0,0 +1,108 @@
+import string
+import pygame
+from time import perf_counter_ns
+from collections import deque
+from contextlib import contextmanager, nullcontext, AbstractContextManager
+
+DISABLED_MEASUREMENT = nullcontext()  # shared, so a disabled measurement in the physics loop costs no allocation
+
+
+class Profiler:
+    """Times named stages of each frame and shows rolling percentiles as an overlay."""
+    def __init__(self, window: int = 240) -> None:
+        self.is_enabled = False
+        self.window = window  # frames kept per stage
+
+        self.frame_times: dict[str, int] = {}  # stage -> nanoseconds spent this frame
+        self.samples: dict[str, deque[int]] = {}  # stage -> nanoseconds of the last frames, in order of first use
+
+        # overlay
+        self.font = None  # created on first draw, as the font module may not be initialised yet
+        self.glyphs: dict[str, pygame.Surface] = {}
+        self.glyph_size = (0, 0)
+        self.background = None
+        self.text_colour = (255, 255, 255)
+        self.background_colour = (0, 0, 0, 180)
+        self.padding = 6
+
+    def toggle(self) -> None:
+        self.is_enabled = not self.is_enabled
+        self.frame_times.clear()
+        self.samples.clear()
+
+    def measure(self, stage: str) -> AbstractContextManager:
+        """Add time spent in the with block to a stage of the current frame."""
+        if not self.is_enabled:
+            return DISABLED_MEASUREMENT
+        return self._measure(stage)
+
+    @contextmanager
+    def _measure(self, stage: str):
+        """Time the with block, only used while the profiler is enabled."""
+        self.frame_times.setdefault(stage, 0)  # keep stages in the order they start
+        start = perf_counter_ns()
+        yield
+        if self.is_enabled:  # the block may have toggled the profiler, clearing frame_times
+            self.frame_times[stage] = self.frame_times.get(stage, 0) + perf_counter_ns() - start
+
+    def end_frame(self) -> None:
+        """Store stage times of the finished frame, counting stages which did not run as 0."""
+        if not self.is_enabled:
+            return
+        for stage in self.frame_times:
+            if stage not in self.samples:
+                self.samples[stage] = deque(maxlen=self.window)
+        for stage, samples in self.samples.items():
+            samples.append(self.frame_times.get(stage, 0))
+        self.frame_times.clear()
+
+    def get_percentiles(self, stage: str) -> tuple[float, float, float]:
+        """Return p50, p95 and p99 of a stage in milliseconds."""
+        samples = sorted(self.samples[stage])
+        return tuple(samples[min(int(len(samples) * q), len(samples) - 1)] / 1e6 for q in (0.5, 0.95, 0.99))
+
+    def _get_glyph(self, char: str) -> pygame.Surface:
+        """Return rendered character, rendering each character only once."""
+        if char not in self.glyphs:
+            self.glyphs[char] = self.font.render(char, True, self.text_colour)
+        return self.glyphs[char]
+
+    def _draw_text(self, surf: pygame.Surface, text: str, pos: tuple[int, int]) -> None:
+        """Draw text from cached glyphs in fixed width cells."""
+        x, y = pos
+        for char in text:
+            if char != ' ':
+                glyph = self._get_glyph(char)
+                surf.blit(glyph, (x + (self.glyph_size[0] - glyph.get_width()) // 2, y))
+            x += self.glyph_size[0]
+
+    def _get_lines(self) -> list[str]:
+        name_width = max(len(stage) for stage in self.samples)
+        lines = [f"{'stage':<{name_width}}   p50    p95    p99 ms"]
+        for stage in self.samples:
+            p50, p95, p99 = self.get_percentiles(stage)
+            lines.append(f"{stage:<{name_width}}{p50:6.2f} {p95:6.2f} {p99:6.2f}")
+        return lines
+
+    def draw(self) -> None:
+        """Draw percentile table to the top left of the display surface."""
+        if not self.is_enabled or not self.samples:
+            return
+        if self.font is None:
+            self.font = pygame.font.Font(None, 20)
+            self.glyph_size = (max(self.font.size(char)[0] for char in string.ascii_letters + string.digits), self.font.get_linesize())
+
+        display_surf = pygame.display.get_surface()
+        lines = self._get_lines()
+        width = max(len(line) for line in lines) * self.glyph_size[0] + self.padding * 2
+        height = len(lines) * self.glyph_size[1] + self.padding * 2
+        if self.background is None or self.background.get_size() != (width, height):
+            self.background = pygame.Surface((width, height), pygame.SRCALPHA)
+            self.background.fill(self.background_colour)
+        display_surf.blit(self.background, (0, 0))
+
+        for i, line in enumerate(lines):
+            self._draw_text(display_surf, line, (self.padding, self.padding + i * self.glyph_size[1]))
+
+
+profiler = Profiler()
@@ -0,0 +1,64 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')  # run without a window
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')  # keep stdout valid JSON
+
+import json
+import hashlib
+import argparse
+import numpy as np
+import pygame
+from time import perf_counter
+from settings import WIDTH, HEIGHT, FPS
+from input import Input, load_recording
+from cursor import Cursor
+from level import Level
+
+
+def run_replay(path: str, level_id: int = 0) -> dict:
+    """Replay recorded input headlessly as fast as possible and return throughput and a hash of the trajectory."""
+    pygame.init()
+    pygame.display.set_mode((WIDTH, HEIGHT))  # cursor images need a display to convert to
+
+    input_ = Input(load_recording(path))
+    level = Level(input_, 1 / FPS, headless=True, level=level_id)
+    level.loading()
+    cursor = Cursor(input_)
+    cursor.player = level.player
+
+    # same order as Game._run, without drawing
+    positions = []
+    start = perf_counter()
+    while True:
+        input_.update([], 0)
+        if input_.is_replay_finished or pygame.K_q in input_.keys:
+            break
+        if pygame.K_r in input_.keys:
+            level.player.death(force=True)
+
+        if not input_.is_paused:
+            cursor.update()
+            level.update(input_.frame_time)
+        positions.append((level.player.pos.x, level.player.pos.y))
+    elapsed = perf_counter() - start
+
+    return {
+        'frames': len(positions),
+        'seconds': elapsed,
+        'frames_per_second': len(positions) / elapsed if elapsed else None,
+        'final_pos': positions[-1] if positions else None,
+        'trajectory_hash': hashlib.sha256(np.array(positions, dtype=np.float64).tobytes()).hexdigest()
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay recorded input headlessly and print the results as JSON.")
+    parser.add_argument('recording', help="file recorded with main.py --record")
+    parser.add_argument('--level', type=int, default=0, help="level the recording was made on")
+    parser.add_argument('--expect', help="trajectory hash the replay must match")
+    args = parser.parse_args()
+
+    result = run_replay(args.recording, args.level)
+    pygame.quit()
+    print(json.dumps(result, indent=2))
+    if args.expect is not None and args.expect != result['trajectory_hash']:
+        raise SystemExit("Trajectory differs from the expected one")
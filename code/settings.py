@@ -3,3 +3,12 @@ HEIGHT = 720
 FPS = 61
 TILE_SIZE = 32
 GRAVITY = 3000
+COLLISION_BACKEND = 'analytic'  # 'analytic' or 'shapely'
+CONTINUOUS_COLLISION = True  # resolve contacts by exact time of impact instead of bisection
+BROAD_PHASE = 'numpy'  # 'numpy' over loaded lines or 'grid' over nearby cells
+MAX_SUBSTEPS = 8  # ceiling on player substeps per physics step, chosen from ball speed
+# collision tiles above which the map is built in worker processes. From benchmark.py serial vs parallel loads, building
+# and optimising costs 33 µs per tile serially, and 0.47 s + 13.7 µs per tile + 28.5 µs per tile / cores in parallel,
+# so the parallel build is faster from about 93000 tiles on 2 cores, 38000 on 4 and 30000 on 8
+PARALLEL_BUILD_MIN_TILES = 40000
+MAX_PHYSICS_STEPS = 8  # fixed physics steps per frame before the game slows down instead of catching up
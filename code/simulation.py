@@ -0,0 +1,79 @@
+import os
+import pygame
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from settings import FPS
+from input import Input
+from level import Level
+from player import Player
+from collision import CollisionWorld
+
+ShotResult = namedtuple('ShotResult', 'shot, pos, steps, is_on_ground, is_dead')
+
+# per-process state, set by _init_worker
+_player: Player | None = None
+_map_size = (0, 0)
+_delta_time = 1 / FPS
+_max_steps = 0
+
+
+def _init_worker(collision_world: CollisionWorld, spawn_pos: tuple, map_size: tuple, delta_time: float, max_steps: int) -> None:
+    """Create one headless player per worker around the shared collision world."""
+    global _player, _map_size, _delta_time, _max_steps
+    collision_world.load_all()  # no camera to stream rows in
+    _player = Player(spawn_pos, collision_world, Input(), headless=True)
+    _map_size = map_size
+    _delta_time = delta_time
+    _max_steps = max_steps
+
+
+def _is_dead(pos: pygame.Vector2, radius: float) -> bool:
+    """Return whether the ball has left the map sideways or through the bottom."""
+    width, height = _map_size
+    return pos.y - radius > height or pos.x + radius < 0 or pos.x - radius > width
+
+
+def _simulate_shot(shot: tuple[float, float]) -> ShotResult:
+    """Shoot from spawn and step until the ball rests, dies or runs out of steps."""
+    player = _player
+    player.death(force=True)  # back to spawn
+    player.shoot(shot)
+
+    steps = 0
+    is_dead = False
+    while steps < _max_steps:
+        player.update(_delta_time)
+        steps += 1
+        if player.is_on_ground:
+            break
+        if _is_dead(player.pos, player.radius):
+            is_dead = True
+            break
+
+    return ShotResult(tuple(shot), (player.pos.x, player.pos.y), steps, player.is_on_ground, is_dead)
+
+
+def simulate_shots(level: int, shots: list[tuple[float, float]], delta_time: float = 1 / FPS,
+                   max_steps: int = FPS * 30, max_workers: int | None = None) -> list[ShotResult]:
+    """Simulate shots, given as mouse offsets from the ball, from the spawn point of a level.
+    The collision world is built once and sent to each worker when it starts."""
+    level_ = Level(Input(), delta_time, headless=True, level=level)
+    level_.loading()
+    spawn_pos = level_.player.rect.midbottom
+    initargs = (level_.collision_world, spawn_pos, level_.get_map_size(), delta_time, max_steps)
+
+    with ProcessPoolExecutor(max_workers, initializer=_init_worker, initargs=initargs) as executor:
+        chunksize = max(1, len(shots) // ((max_workers or os.cpu_count() or 1) * 4))
+        return list(executor.map(_simulate_shot, shots, chunksize=chunksize))
+
+
+if __name__ == '__main__':
+    from time import perf_counter
+
+    shots = [(x, y) for x in range(-400, 401, 50) for y in range(-400, 1, 50)]
+    start = perf_counter()
+    results = simulate_shots(0, shots)
+    print(f"{len(results)} shots in {perf_counter() - start:.2f}s")
+    for result in results:
+        if result.is_on_ground:
+            print(f"{result.shot} -> ({result.pos[0]:.0f}, {result.pos[1]:.0f}) in {result.steps} steps")
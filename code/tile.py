@@ -3,12 +3,24 @@ from math import pi, sin, cos, sqrt, acos, atan, degrees
 from settings import TILE_SIZE
 from collections import namedtuple
 from dataclasses import dataclass
+from functools import cached_property, lru_cache
 from game_data import Map
-from shapely.geometry import LineString, Polygon
+from shapely.geometry import LineString
 from helper import Point
 
 
 TileData = namedtuple('TileData', 'rel_vertices, center, bounciness')
+LineTemplate = namedtuple('LineTemplate', 'rel_coords, angle')
+
+
+@lru_cache(maxsize=None)
+def get_normal(angle: float) -> tuple[float, float]:
+    """Returns normalized normal vector components from line angle."""
+    angle_rad = angle * (pi / 180)
+    x = sin(angle_rad)
+    y = -cos(angle_rad)
+    length = sqrt(x ** 2 + y ** 2)
+    return x / length, y / length
 
 
 @dataclass
@@ -17,12 +29,25 @@ class LineHitbox:
     rel_coords: tuple
     angle: float
     tile_pos: tuple
+    bounciness: float = 0
+    tile_type: Map = None
 
     def __post_init__(self) -> None:
         """Adds attributes post-init."""
         self.coords = self._get_real_coords()
         self.normal_vect = self._get_normal_vect()
-        self.hitbox = LineString(self.coords)
+
+    @classmethod
+    def from_coords(cls, coords: tuple, angle: float, bounciness: float = 0, tile_type: Map = None) -> 'LineHitbox':
+        """Returns LineHitbox placed by real coordinates instead of a tile position."""
+        start, end = coords
+        rel_end = ((end[0] - start[0]) / TILE_SIZE, (end[1] - start[1]) / TILE_SIZE)
+        return cls(((0, 0), rel_end), angle, start, bounciness, tile_type)
+
+    @cached_property
+    def hitbox(self) -> LineString:
+        """Shapely line, only built when the shapely collision backend asks for it."""
+        return LineString(self.coords)
 
     def _get_real_coords(self) -> tuple[tuple[float, float]]:
         """Returns real coordinates from relative coordinates."""
@@ -30,10 +55,7 @@ class LineHitbox:
 
     def _get_normal_vect(self) -> pygame.Vector2:
         """Returns normalized normal vector from line angle."""
-        angle_rad = self.angle * (pi / 180)
-        x = sin(angle_rad)
-        y = -cos(angle_rad)
-        return pygame.Vector2(x, y).normalize()
+        return pygame.Vector2(get_normal(self.angle))
 
 
 @dataclass
@@ -79,100 +101,72 @@ class TileType:
     )  # no hitbox
 
 
+@lru_cache(maxsize=None)
+def get_line_templates(tile_data: TileData) -> tuple[LineTemplate]:
+    """Returns outside lines and their normal angles relative to the tile, computed once per tile type."""
+    if len(tile_data.rel_vertices) == 2:
+        # flat tile with a single upwards facing line
+        return (LineTemplate(tile_data.rel_vertices, 0),)
+
+    # get all outside connecting lines
+    line_list = []
+    for i in tile_data.rel_vertices:
+        angle_dict = {}  # find 2 lines with the largest angle from the centre
+        for j in tile_data.rel_vertices:
+            if i is j:
+                continue
+            # C = acos((a^2 + b^2 - c^2) / 2ab)
+            a = sqrt((i.x - tile_data.center.x) ** 2 + (i.y - tile_data.center.y) ** 2)
+            b = sqrt((i.x - j.x) ** 2 + (i.y - j.y) ** 2)
+            c = sqrt((j.x - tile_data.center.x) ** 2 + (j.y - tile_data.center.y) ** 2)
+            angle = acos((a ** 2 + b ** 2 - c ** 2) / (2 * a * b))
+            angle_dict[i, j] = angle
+
+        # sort by angle
+        if angle_dict:
+            coord_list_sort = sorted(angle_dict.keys(), key=lambda k: angle_dict[k], reverse=True)
+            for x in range(2):
+                coords = coord_list_sort[x]
+                if coords in line_list or coords[::-1] in line_list:
+                    continue
+                line_list.append(coord_list_sort[x])
+
+    # get angle of normal vector facing outwards
+    line_data_list = []
+    for i, lines in enumerate(line_list):
+        dy = lines[0].y - lines[1].y
+        dx = lines[0].x - lines[1].x
+        if dx == 0:
+            # avoid division by 0
+            gradient = 999999999
+        else:
+            gradient = dy / dx
+
+        angle = degrees(atan(gradient))
+
+        # if line faces another point, rotate angle by 180
+        x, y = line_list[(i + 1) % len(line_list)][0]
+        if y - lines[0].y < gradient * (x - lines[0].x):
+            angle = (angle + 180) % 360
+
+        # remove negative by rolling up
+        angle = (angle + 360) % 360
+
+        line_data_list.append(LineTemplate(lines, angle))
+    return tuple(line_data_list)
+
+
 class Tile(pygame.sprite.Sprite):
     """Controls tile functions."""
-    def __init__(self, pos: tuple, group: list[pygame.sprite.Group], tile_data: TileData, tile_type: Map) -> None:
+    def __init__(self, pos: tuple, group: list[pygame.sprite.Group], tile_type: Map) -> None:
         super().__init__(group)
         self.pos = pos
-
-        # get attributes
         self.type = tile_type
-        self.rel_vertices = tile_data.rel_vertices
-        self.center = tile_data.center
-        self.real_coord_list = [(i.x * TILE_SIZE + pos[0], i.y * TILE_SIZE + pos[1]) for i in self.rel_vertices]
-        self.bounciness = tile_data.bounciness
-
-        # get hitbox
-        self.line_list = self._get_line_data_list()
-        self.hitbox = self._get_hitbox()
-
-    def _get_line_data_list(self) -> list[LineHitbox]:
-        """Returns list with LineHitbox objects."""
-        # get all outside connecting lines
-        line_list = []
-        for i in self.rel_vertices:
-            angle_dict = {}  # find 2 lines with the largest angle from the centre
-            for j in self.rel_vertices:
-                if i is j:
-                    continue
-                # C = acos((a^2 + b^2 - c^2) / 2ab)
-                a = sqrt((i.x - self.center.x) ** 2 + (i.y - self.center.y) ** 2)
-                b = sqrt((i.x - j.x) ** 2 + (i.y - j.y) ** 2)
-                c = sqrt((j.x - self.center.x) ** 2 + (j.y - self.center.y) ** 2)
-                angle = acos((a ** 2 + b ** 2 - c ** 2) / (2 * a * b))
-                angle_dict[i, j] = angle
-
-            # sort by angle
-            if angle_dict:
-                coord_list_sort = sorted(angle_dict.keys(), key=lambda k: angle_dict[k], reverse=True)
-                for x in range(2):
-                    coords = coord_list_sort[x]
-                    if coords in line_list or coords[::-1] in line_list:
-                        continue
-                    line_list.append(coord_list_sort[x])
-
-        # get angle of normal vector facing outwards
-        line_data_list = []
-        for i, lines in enumerate(line_list):
-            dy = lines[0].y - lines[1].y
-            dx = lines[0].x - lines[1].x
-            if dx == 0:
-                # avoid division by 0
-                gradient = 999999999
-            else:
-                gradient = dy / dx
-
-            angle = degrees(atan(gradient))
-
-            # if line faces another point, rotate angle by 180
-            x, y = line_list[(i + 1) % len(line_list)][0]
-            if y - lines[0].y < gradient * (x - lines[0].x):
-                angle = (angle + 180) % 360
-
-            # remove negative by rolling up
-            angle = (angle + 360) % 360
-
-            # add to LineHitbox object to line_data_list
-            line_data_list.append(LineHitbox(lines, angle, self.pos))
-        return line_data_list
-
-    def _get_hitbox(self) -> Polygon:
-        """Return polygon hitbox."""
-        if len(self.real_coord_list) > 2:
-            return Polygon(self.real_coord_list)
 
 
 class Terrain(Tile):
-    """Child class of Tile. Contains an image surface and no hitbox."""
+    """Child class of Tile. Contains an image surface and no hitbox, collision lines live in the collision world."""
     def __init__(self, pos: tuple, group: list[pygame.sprite.Group], tile_type: Map, image: pygame.Surface) -> None:
-        super().__init__(pos, group, TileType.platform, tile_type)
+        super().__init__(pos, group, tile_type)
         self.image = image
         self.rect = image.get_rect(topleft=pos)
-
-    def _get_line_data_list(self) -> None:
-        return
-
-
-class Platform(Tile):
-    """Child class of Tile. Contains a single LineHitbox object and a y value."""
-    def __init__(self, pos: tuple, group: list[pygame.sprite.Group], tile_type: Map) -> None:
-        super().__init__(pos, group, TileType.platform, tile_type)
-        self.y = pos[1]
-
-    def _get_hitbox(self) -> LineString:
-        return self.line_list[0].hitbox
-
-    def _get_line_data_list(self) -> list[LineHitbox]:
-        """Returns list with LineHitbox objects."""
-        line_list = [LineHitbox((self.rel_vertices[0], self.rel_vertices[1]), 0, self.pos)]
-        return line_list